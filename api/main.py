@@ -1,67 +1,256 @@
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import FileResponse, PlainTextResponse, Response
+from starlette.concurrency import run_in_threadpool
 from pydantic import BaseModel
-import sqlite3
+from typing import List, Optional
+from contextlib import asynccontextmanager
+import anyio
+import json
 import os
+import time
+import zlib
 from datetime import datetime
 from scripts.scanner_event_queue import get_latest_uid
+from scripts.student_import import parse_students, import_students
+from scripts.archive_students import archive_students
+from scripts.student_search import STUDENT_COLUMNS, SEARCH_LIMIT, list_students, search_students
+from scripts.student_photos import (MAX_PHOTO_BYTES, MEDIA_TYPES, PHOTO_NAME, photo_path, photo_urls,
+                                    remove_unused_photo, save_photo)
+from scripts.stats import attendance_distribution, attendance_groups, roster_distribution
+from scripts.config import settings
+from scripts.create_db import create_tables
+from scripts.attendance_partitions import attendance_source, roll_over
+from scripts.db import connect, file_lock, query_stats
+from scripts.sync import SYNC_TOKEN, decode_batch, ingest_scans, roster_changes, roster_snapshot, roster_version
+from scripts import metrics, profiling
+from scripts.compression import COMPRESS, CompressionMiddleware
+from scripts.supervisor import heartbeat_age, process_uptime, read_status
 
-BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-DB_PATH = os.path.join(BASE_DIR, "database", "students.db")
+DB_PATH = settings["db_path"]
 
-app = FastAPI()
+# Number of uvicorn worker processes run.py starts; with more than one, each worker reports
+# its metrics under its own process label and publishes them for the others to merge
+API_WORKERS = settings["api_workers"]
+METRICS_PROCESS = "api" if API_WORKERS <= 1 else f"api-{os.getpid()}"
+_metrics_published = 0.0
+
+# Single-process mode (run.py --single): the scanner runs on a thread of the API process
+EMBEDDED_SCANNER = settings["embedded_scanner"]
+# Threads serving the blocking endpoints (and so the most SQLite connections open at once)
+API_THREADS = settings["api_threads"]
+
+def init_db(roll=True):
+    os.makedirs(os.path.dirname(DB_PATH), exist_ok=True)
+    # Every worker runs this on start-up; only one at a time may migrate and roll partitions over
+    with file_lock(DB_PATH + ".lock"):
+        conn = connect(DB_PATH)
+        create_tables(conn)
+        if roll:
+            roll_over(conn)
+        conn.close()
+
+@asynccontextmanager
+async def lifespan(app):
+    anyio.to_thread.current_default_thread_limiter().total_tokens = API_THREADS
+    stop_scanner = None
+    if EMBEDDED_SCANNER:
+        if API_WORKERS > 1:
+            raise RuntimeError("The in-process scanner needs a single API worker (RFID_API_WORKERS=1)")
+        # Schema first, then the scanner, then the slower partition maintenance, so cards are
+        # accepted as early as possible after boot
+        init_db(roll=False)
+        from scripts.attendance_logger import start_background  # pulls in the hardware layer only when used
+        stop_scanner = start_background(DB_PATH)
+        print(f"⏱️ Accepting scans {process_uptime():.2f}s after process start")
+    init_db()
+    print(f"⏱️ API ready {process_uptime():.2f}s after process start")
+    try:
+        yield
+    finally:
+        if stop_scanner:
+            stop_scanner()
+
+app = FastAPI(lifespan=lifespan)
+
+# Added first so it sits innermost: request metrics and profiles include the compression time
+if COMPRESS:
+    app.add_middleware(CompressionMiddleware)
 
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor"],
 )
 
+http_requests = metrics.counter("rfid_http_requests_total", "HTTP requests by endpoint and status",
+                                ("method", "endpoint", "status"))
+http_latency = metrics.histogram("rfid_http_request_seconds", "HTTP request latency by endpoint",
+                                 ("method", "endpoint"))
+
+if metrics.ENABLED:
+    @app.middleware("http")
+    async def record_request_metrics(request: Request, call_next):
+        started = time.perf_counter()
+        response = await call_next(request)
+        # Label by route template (/students/{uid}) rather than the raw path
+        route = request.scope.get("route")
+        endpoint = route.path if route is not None else "unmatched"
+        http_latency.observe(time.perf_counter() - started, method=request.method, endpoint=endpoint)
+        http_requests.inc(method=request.method, endpoint=endpoint, status=response.status_code)
+        global _metrics_published
+        if API_WORKERS > 1 and time.monotonic() - _metrics_published >= 1.0:
+            _metrics_published = time.monotonic()
+            metrics.write_state(METRICS_PROCESS)
+        return response
+
+# Profiles can only be read back with the token, so without one nothing is profiled at all
+if profiling.PROFILE_SAMPLE_RATE > 0 and not profiling.PROFILE_TOKEN:
+    print("⚠️ RFID_PROFILE_SAMPLE is ignored: set RFID_PROFILE_TOKEN to profile requests")
+
+if profiling.PROFILE_TOKEN:
+    @app.middleware("http")
+    async def profile_request(request: Request, call_next):
+        # The /debug endpoints are called with the token too; profiling them would push out real profiles
+        reason = None if request.url.path.startswith("/debug/") else profiling.should_profile(request.headers)
+        profiler = profiling.begin() if reason else None
+        if profiler is None:
+            return await call_next(request)
+        started = time.perf_counter()
+        status = 500
+        try:
+            response = await call_next(request)
+            status = response.status_code
+        finally:
+            profile_id = profiling.finish(profiler, method=request.method, path=request.url.path,
+                                          query=request.url.query, status=status, reason=reason,
+                                          duration_ms=round((time.perf_counter() - started) * 1000, 3))
+        response.headers["X-Profile-Id"] = str(profile_id)
+        return response
+
 @app.get("/")
 def home():
     return {"message": "RFID Attendance API is running."}
 
 @app.get("/students")
-def get_students():
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
-    cursor.execute("SELECT uid, name, reg_no, department, year, section, image FROM students")
-    rows = cursor.fetchall()
-    conn.close()
-    return [
-        {
-            "uid": uid,
-            "name": name,
-            "reg_no": reg_no,
-            "department": department,
-            "year": year,
-            "section": section,
-            "image": image
-        }
-        for (uid, name, reg_no, department, year, section, image) in rows
-    ]
+def get_students(request: Request, response: Response, department: Optional[str] = None, year: Optional[str] = None,
+                 section: Optional[str] = None, sort: Optional[str] = None, limit: Optional[int] = None,
+                 offset: int = 0, cursor: Optional[str] = None, fields: Optional[str] = None):
+    """Students, optionally filtered, sorted ("name", "-reg_no", ...), paged and projected (fields=uid,name).
+
+    Without limit every matching student is returned. With it, X-Next-Cursor carries the cursor
+    for the next page and is absent on the last one. The ETag changes with the roster version, so
+    an unchanged roster costs a 304 (or a compressed copy cached by CompressionMiddleware).
+    """
+    if limit is not None and limit < 1 or offset < 0:
+        raise HTTPException(status_code=400, detail="limit must be positive and offset non-negative")
+    columns = tuple(field.strip() for field in fields.split(",") if field.strip()) if fields else STUDENT_COLUMNS
+    conn = connect(DB_PATH)
+    try:
+        etag = f'"students-{roster_version(conn)}-{zlib.crc32(request.url.query.encode()):08x}"'
+        if request.headers.get("if-none-match") == etag:
+            return Response(status_code=304, headers={"ETag": etag, "Cache-Control": "no-cache"})
+        rows, next_cursor = list_students(conn, department, year, section, sort, limit, offset, cursor, columns)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    finally:
+        conn.close()
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = "no-cache"
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    return [dict(zip(columns, row)) for row in rows]
+
+@app.get("/students/search")
+def search_students_endpoint(q: str = "", department: Optional[str] = None, year: Optional[str] = None,
+                             section: Optional[str] = None, limit: int = SEARCH_LIMIT, fuzzy: bool = True,
+                             offset: int = 0):
+    """Name / reg no search (substring, prefix first, typo-tolerant) with department/year/section filters"""
+    conn = connect(DB_PATH)
+    try:
+        rows, truncated = search_students(conn, q, department, year, section, limit, fuzzy, offset)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    finally:
+        conn.close()
+    return {"results": [dict(zip(STUDENT_COLUMNS, row)) for row in rows], "truncated": truncated}
 
 @app.get("/students/{uid}")
 def get_student_by_uid(uid: str):
-    conn = sqlite3.connect(DB_PATH)
+    conn = connect(DB_PATH)
     cursor = conn.cursor()
-    cursor.execute("SELECT uid, name, reg_no, department, year, section FROM students WHERE uid = ?", (uid,))
+    cursor.execute("SELECT uid, name, reg_no, department, year, section, image FROM students WHERE uid = ?", (uid,))
     row = cursor.fetchone()
     conn.close()
     if row:
-        uid, name, reg_no, department, year, section = row
+        uid, name, reg_no, department, year, section, image = row
         return {
             "uid": uid,
             "name": name,
             "reg_no": reg_no,
             "department": department,
             "year": year,
-            "section": section
+            "section": section,
+            **photo_urls(image)
         }
     else:
         raise HTTPException(status_code=404, detail="Student not found")
 
+def _set_student_photo(uid, data):
+    """Store the photo, point the student at it and drop the one it replaced; None for an unknown uid"""
+    conn = connect(DB_PATH)
+    try:
+        row = conn.execute("SELECT image FROM students WHERE uid = ?", (uid,)).fetchone()
+        if not row:
+            return None
+        name = save_photo(data)
+        conn.execute("UPDATE students SET image = ? WHERE uid = ?", (name, uid))
+        conn.commit()
+        if row[0] != name:
+            remove_unused_photo(conn, row[0])
+        return name
+    finally:
+        conn.close()
+
+@app.put("/students/{uid}/photo")
+async def upload_student_photo(uid: str, request: Request):
+    """Set a student's photo from a raw JPEG, PNG, GIF or WebP request body"""
+    too_large = HTTPException(status_code=413, detail=f"Photo is larger than {MAX_PHOTO_BYTES} bytes")
+    length = request.headers.get("content-length")
+    if length is not None and not length.isdigit():
+        raise HTTPException(status_code=400, detail="Invalid Content-Length")
+    if int(length or 0) > MAX_PHOTO_BYTES:
+        raise too_large
+    # Read in chunks so a body sent without Content-Length (chunked) can't grow past the limit
+    chunks, size = [], 0
+    async for chunk in request.stream():
+        size += len(chunk)
+        if size > MAX_PHOTO_BYTES:
+            raise too_large
+        chunks.append(chunk)
+    data = b"".join(chunks)
+    try:
+        name = await run_in_threadpool(_set_student_photo, uid, data)
+    except ValueError as e:
+        raise HTTPException(status_code=413 if len(data) > MAX_PHOTO_BYTES else 415, detail=str(e))
+    if name is None:
+        raise HTTPException(status_code=404, detail="Student not found")
+    return {"success": True, "image": name, **photo_urls(name)}
+
+@app.get("/photos/{name}")
+def get_photo(name: str, request: Request):
+    """A stored photo or thumbnail. Names are content hashes, so responses are cacheable forever"""
+    match = PHOTO_NAME.match(name)
+    path = photo_path(name) if match else None
+    if not path or not os.path.isfile(path):
+        raise HTTPException(status_code=404, detail="Photo not found")
+    headers = {"Cache-Control": "public, max-age=31536000, immutable", "ETag": f'"{name}"'}
+    if request.headers.get("if-none-match") == headers["ETag"]:
+        return Response(status_code=304, headers=headers)
+    return FileResponse(path, media_type=MEDIA_TYPES[match.group(3)], headers=headers)
+
 class Student(BaseModel):
     uid: str
     name: str
@@ -72,7 +261,7 @@ class Student(BaseModel):
 
 @app.post("/students")
 def register_student(student: Student):
-    conn = sqlite3.connect(DB_PATH)
+    conn = connect(DB_PATH)
     cursor = conn.cursor()
     cursor.execute("SELECT uid FROM students WHERE uid = ?", (student.uid,))
     if cursor.fetchone():
@@ -91,13 +280,140 @@ def register_student(student: Student):
     finally:
         conn.close()
 
+def _import_students(rows):
+    conn = connect(DB_PATH)
+    try:
+        return import_students(conn, rows)
+    finally:
+        conn.close()
+
+@app.post("/students/bulk")
+async def register_students_bulk(request: Request):
+    """Register many students at once from a JSON array, NDJSON or CSV body"""
+    body = await request.body()
+    try:
+        rows = parse_students(body, request.headers.get("content-type", ""))
+    except (ValueError, UnicodeDecodeError) as e:
+        raise HTTPException(status_code=400, detail=f"Could not parse upload: {str(e)}")
+
+    try:
+        inserted, problems = await run_in_threadpool(_import_students, rows)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Bulk registration failed: {str(e)}")
+
+    return {
+        "success": not problems,
+        "message": f"Registered {inserted} of {len(rows)} students",
+        "inserted": inserted,
+        "conflicts": problems
+    }
+
+def _ingest_scans(node, scans):
+    conn = connect(DB_PATH)
+    try:
+        return ingest_scans(conn, node, scans)
+    finally:
+        conn.close()
+
+def _check_sync_token(request):
+    if SYNC_TOKEN and request.headers.get("x-sync-token") != SYNC_TOKEN:
+        raise HTTPException(status_code=401, detail="Invalid sync token")
+
+@app.post("/sync/attendance")
+async def sync_attendance(request: Request):
+    """Ingest a (gzip-compressed) batch of scans forwarded by an edge node's sync agent"""
+    _check_sync_token(request)
+    body = await request.body()
+    try:
+        node, scans = decode_batch(body, request.headers.get("content-encoding", ""))
+    except (ValueError, OSError, UnicodeDecodeError) as e:
+        raise HTTPException(status_code=400, detail=f"Could not parse batch: {str(e)}")
+
+    try:
+        inserted, duplicates = await run_in_threadpool(_ingest_scans, node, scans)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Ingest failed: {str(e)}")
+
+    return {"success": True, "node": node, "received": len(scans), "inserted": inserted, "duplicates": duplicates}
+
+# (version, etag, json body) of the last roster snapshot served
+_roster_snapshot = None
+
+def _roster_response(request, etag, body):
+    """Serve a JSON body with an ETag, 304 for a matching If-None-Match. CompressionMiddleware
+    compresses it once per ETag and encoding"""
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers=headers)
+    return Response(body, media_type="application/json", headers=headers)
+
+@app.get("/roster/snapshot")
+def get_roster_snapshot(request: Request):
+    """The whole roster with its version, compact (column list + row arrays) for edge nodes"""
+    global _roster_snapshot
+    _check_sync_token(request)
+    conn = connect(DB_PATH)
+    try:
+        version = roster_version(conn)
+        if _roster_snapshot is None or _roster_snapshot[0] != version:
+            metrics.cache_requests.inc(cache="roster_snapshot", result="miss")
+            snapshot = roster_snapshot(conn)
+            body = json.dumps(snapshot, separators=(",", ":")).encode("utf-8")
+            _roster_snapshot = (snapshot["version"], f'"roster-{snapshot["version"]}"', body)
+        else:
+            metrics.cache_requests.inc(cache="roster_snapshot", result="hit")
+    finally:
+        conn.close()
+    _, etag, body = _roster_snapshot
+    return _roster_response(request, etag, body)
+
+@app.get("/roster/changes")
+def get_roster_changes(request: Request, since: int):
+    """Students added, changed or removed after roster version `since`"""
+    _check_sync_token(request)
+    conn = connect(DB_PATH)
+    try:
+        changes = roster_changes(conn, since)
+    finally:
+        conn.close()
+    if since > changes["version"]:
+        raise HTTPException(status_code=410, detail="Unknown roster version; fetch /roster/snapshot")
+    body = json.dumps(changes, separators=(",", ":")).encode("utf-8")
+    return _roster_response(request, f'"roster-{since}-{changes["version"]}"', body)
+
+def _check_dates(*dates):
+    # Dates are compared as text, so anything but zero-padded YYYY-MM-DD would silently match nothing
+    for date in dates:
+        if date is None:
+            continue
+        try:
+            valid = datetime.strptime(date, "%Y-%m-%d").strftime("%Y-%m-%d") == date
+        except ValueError:
+            valid = False
+        if not valid:
+            raise HTTPException(status_code=400, detail="Dates must be YYYY-MM-DD")
+
 @app.get("/attendance")
-def get_attendance():
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
-    cursor.execute("SELECT uid, name, date, time, status FROM attendance ORDER BY date DESC, time DESC")
-    rows = cursor.fetchall()
-    conn.close()
+def get_attendance(start_date: Optional[str] = None, end_date: Optional[str] = None):
+    _check_dates(start_date, end_date)
+    conn = connect(DB_PATH)
+    try:
+        # Only partitions overlapping the requested range are attached
+        source = attendance_source(conn, start_date, end_date)
+        query = f"SELECT uid, name, date, time, status FROM {source} WHERE 1=1"
+        params = []
+        if start_date:
+            query += " AND date >= ?"
+            params.append(start_date)
+        if end_date:
+            query += " AND date <= ?"
+            params.append(end_date)
+        query += " ORDER BY date DESC, time DESC"
+        cursor = conn.cursor()
+        cursor.execute(query, params)
+        rows = cursor.fetchall()
+    finally:
+        conn.close()
     return [
         {
             "uid": uid,
@@ -110,10 +426,35 @@ def get_attendance():
     ]
 
 @app.get("/attendance/today")
-def get_attendance_today():
+def get_attendance_today(include_student: bool = False):
     today = datetime.now().strftime("%Y-%m-%d")
-    conn = sqlite3.connect(DB_PATH)
+    conn = connect(DB_PATH)
     cursor = conn.cursor()
+    if include_student:
+        # One indexed join so the dashboard doesn't need the roster to render the table
+        cursor.execute('''
+            SELECT a.uid, a.name, a.date, a.time, a.status, s.reg_no, s.section, s.year, s.department
+            FROM attendance a
+            LEFT JOIN students s ON s.uid = a.uid
+            WHERE a.date = ?
+        ''', (today,))
+        rows = cursor.fetchall()
+        conn.close()
+        return [
+            {
+                "uid": uid,
+                "name": name,
+                "date": date,
+                "time": time,
+                "status": status,
+                "reg_no": reg_no,
+                "section": section,
+                "year": year,
+                "department": department
+            }
+            for (uid, name, date, time, status, reg_no, section, year, department) in rows
+        ]
+
     cursor.execute("SELECT uid, name, date, time, status FROM attendance WHERE date = ?", (today,))
     rows = cursor.fetchall()
     conn.close()
@@ -128,19 +469,146 @@ def get_attendance_today():
         for (uid, name, date, time, status) in rows
     ]
 
+SUMMARY_QUERY = """
+    WITH days AS (
+        SELECT uid, date, MAX(status = 'Present') AS present
+        FROM {source}
+        WHERE date >= ? AND date <= ? {uid_filter}
+        GROUP BY uid, date
+    ),
+    runs AS (
+        SELECT uid, date, present,
+               ROW_NUMBER() OVER (PARTITION BY uid ORDER BY date)
+               - ROW_NUMBER() OVER (PARTITION BY uid, present ORDER BY date) AS grp
+        FROM days
+    ),
+    streaks AS (
+        SELECT uid, present, COUNT(*) AS length, MAX(date) AS last_date
+        FROM runs
+        GROUP BY uid, present, grp
+    ),
+    totals AS (
+        SELECT uid, SUM(present) AS present_days, COUNT(*) - SUM(present) AS absent_days, MAX(date) AS last_date
+        FROM days
+        GROUP BY uid
+    ),
+    streak_totals AS (
+        SELECT k.uid,
+               MAX(CASE WHEN k.present = 1 THEN k.length END) AS longest_streak,
+               MAX(CASE WHEN k.present = 1 AND k.last_date = t.last_date THEN k.length END) AS current_streak
+        FROM streaks k JOIN totals t ON t.uid = k.uid
+        GROUP BY k.uid
+    )
+    SELECT s.uid, s.name, s.reg_no, s.department, s.year, s.section,
+           COALESCE(t.present_days, 0), COALESCE(t.absent_days, 0),
+           COALESCE(k.current_streak, 0), COALESCE(k.longest_streak, 0), t.last_date
+    FROM students s
+    LEFT JOIN totals t ON t.uid = s.uid
+    LEFT JOIN streak_totals k ON k.uid = s.uid
+    {student_filter}
+    ORDER BY s.name
+"""
+
+def _attendance_summaries(start_date=None, end_date=None, uid=None):
+    """Per-student present/absent counts and streaks, computed entirely in SQLite"""
+    _check_dates(start_date, end_date)
+    conn = connect(DB_PATH)
+    try:
+        source = attendance_source(conn, start_date, end_date)
+        params = [start_date or "0000-00-00", end_date or "9999-99-99"]
+        uid_filter = student_filter = ""
+        if uid is not None:
+            uid_filter = "AND uid = ?"
+            student_filter = "WHERE s.uid = ?"
+            params += [uid, uid]
+        cursor = conn.cursor()
+        cursor.execute(SUMMARY_QUERY.format(source=source, uid_filter=uid_filter, student_filter=student_filter),
+                       params)
+        rows = cursor.fetchall()
+    finally:
+        conn.close()
+    return [
+        {
+            "uid": uid,
+            "name": name,
+            "reg_no": reg_no,
+            "department": department,
+            "year": year,
+            "section": section,
+            "present": present,
+            "absent": absent,
+            "total_days": present + absent,
+            "percentage": round(100.0 * present / (present + absent), 1) if present + absent else None,
+            "current_streak": current_streak,
+            "longest_streak": longest_streak,
+            "last_date": last_date
+        }
+        for (uid, name, reg_no, department, year, section,
+             present, absent, current_streak, longest_streak, last_date) in rows
+    ]
+
+@app.get("/students/{uid}/attendance-summary")
+def get_student_attendance_summary(uid: str, start_date: Optional[str] = None, end_date: Optional[str] = None):
+    summaries = _attendance_summaries(start_date, end_date, uid)
+    if not summaries:
+        raise HTTPException(status_code=404, detail="Student not found")
+    return summaries[0]
+
+@app.get("/attendance/summary")
+def get_attendance_summary(start_date: Optional[str] = None, end_date: Optional[str] = None):
+    return _attendance_summaries(start_date, end_date)
+
+# (roster version, counts) of the roster breakdown, and per date (roster version, groups, mark) of the
+# attendance breakdown; see attendance_groups. Scans only add their own rows to a cached day.
+_roster_distribution = None
+_attendance_groups = {}
+
+@app.get("/stats/distribution")
+def get_stats_distribution(date: Optional[str] = None):
+    """Student counts by year, department and section, and attendance by status for a date (default today)"""
+    global _roster_distribution
+    date = date or datetime.now().strftime("%Y-%m-%d")
+    try:
+        datetime.strptime(date, "%Y-%m-%d")
+    except ValueError:
+        raise HTTPException(status_code=400, detail="date must be YYYY-MM-DD")
+    conn = connect(DB_PATH)
+    try:
+        version = roster_version(conn)
+        if _roster_distribution is None or _roster_distribution[0] != version:
+            metrics.cache_requests.inc(cache="roster_distribution", result="miss")
+            _roster_distribution = (version, roster_distribution(conn))
+        else:
+            metrics.cache_requests.inc(cache="roster_distribution", result="hit")
+
+        # A roster change can move or remove attendance, so it starts the day's counts afresh
+        cached_version, groups, mark = _attendance_groups.get(date, (None, None, None))
+        if cached_version != version:
+            groups = mark = None
+        new_groups, new_mark = attendance_groups(conn, date, groups, mark)
+        hit = groups is not None and new_mark is not None and new_mark == mark
+        metrics.cache_requests.inc(cache="attendance_distribution", result="hit" if hit else "miss")
+        if date not in _attendance_groups and len(_attendance_groups) >= 31:
+            _attendance_groups.clear()
+        _attendance_groups[date] = (version, new_groups, new_mark)
+    finally:
+        conn.close()
+    return {"roster_version": version, **_roster_distribution[1],
+            "attendance": attendance_distribution(date, new_groups)}
+
 @app.delete("/students/{uid}")
 def delete_student(uid: str):
-    conn = sqlite3.connect(DB_PATH)
+    conn = connect(DB_PATH)
     cursor = conn.cursor()
-    cursor.execute("SELECT name FROM students WHERE uid = ?", (uid,))
+    cursor.execute("SELECT name, image FROM students WHERE uid = ?", (uid,))
     student = cursor.fetchone()
     if not student:
         conn.close()
         raise HTTPException(status_code=404, detail="Student not found")
     try:
-        cursor.execute("DELETE FROM students WHERE uid = ?", (uid,))
-        cursor.execute("DELETE FROM attendance WHERE uid = ?", (uid,))
-        conn.commit()
+        # Also clears the student's rows out of sealed attendance partitions
+        archive_students(conn, [uid], purge=True)
+        remove_unused_photo(conn, student[1])
         return {
             "success": True,
             "message": f"Deleted {student[0]} (UID: {uid})"
@@ -151,6 +619,106 @@ def delete_student(uid: str):
     finally:
         conn.close()
 
+class ArchiveRequest(BaseModel):
+    uids: Optional[List[str]] = None
+    section: Optional[str] = None
+    year: Optional[str] = None
+    purge: bool = False
+
+@app.post("/students/archive")
+def archive_students_bulk(request: ArchiveRequest):
+    """Archive (or purge) every student matching the filters along with their attendance"""
+    if not (request.uids or request.section or request.year):
+        raise HTTPException(status_code=400, detail="Provide uids, section or year")
+    conn = connect(DB_PATH)
+    try:
+        students, records = archive_students(conn, request.uids, request.section, request.year, request.purge)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to archive: {str(e)}")
+    finally:
+        conn.close()
+    if not students:
+        raise HTTPException(status_code=404, detail="No matching students")
+    action = "Deleted" if request.purge else "Archived"
+    return {
+        "success": True,
+        "message": f"{action} {students} student(s) and {records} attendance record(s)",
+        "students": students,
+        "attendance": records
+    }
+
+@app.get("/health")
+def get_health():
+    """Database reachability plus the state of every component run.py supervises"""
+    try:
+        conn = connect(DB_PATH)
+        conn.execute("SELECT 1 FROM students LIMIT 1").fetchall()
+        conn.close()
+        database = "ok"
+    except Exception as e:
+        database = f"error: {e}"
+
+    if EMBEDDED_SCANNER:
+        # Single-process mode: nothing to supervise, but the scanner thread still beats
+        supervisor, supervised = None, False
+        age = heartbeat_age("logger")
+        components = [{"name": "scanner", "state": "ready" if age is not None and age < 10 else "stalled"}]
+    else:
+        supervisor = read_status()
+        components = supervisor["components"] if supervisor else []
+        # The supervisor rewrites its status every second; an old file means it is gone
+        supervised = supervisor is not None and time.time() - supervisor["updated_at"] < 10
+    healthy = database == "ok" and all(component["state"] == "ready" for component in components)
+    body = {
+        "status": "ok" if healthy else "degraded",
+        "database": database,
+        "supervised": supervised,
+        "components": components,
+    }
+    if database != "ok":
+        raise HTTPException(status_code=503, detail=body)
+    return body
+
+@app.get("/metrics", response_class=PlainTextResponse)
+def get_metrics():
+    """Prometheus text exposition for the API and the attendance logger"""
+    if not metrics.ENABLED:
+        return PlainTextResponse("# metrics disabled (RFID_METRICS=0)\n")
+    body = metrics.render(METRICS_PROCESS, metrics.read_states(exclude=(METRICS_PROCESS,), max_age=600))
+    return PlainTextResponse(body, media_type="text/plain; version=0.0.4")
+
+def _check_profile_token(request):
+    # SQL text and stack traces are for operators only; without a token the endpoints don't exist
+    if not profiling.PROFILE_TOKEN:
+        raise HTTPException(status_code=404, detail="Not Found")
+    if request.headers.get("x-profile") != profiling.PROFILE_TOKEN:
+        raise HTTPException(status_code=401, detail="Invalid profile token")
+
+@app.get("/debug/queries")
+def get_query_stats(request: Request, limit: int = 50):
+    """Per-statement SQL timings for this API process, slowest total first"""
+    _check_profile_token(request)
+    return query_stats(limit)
+
+@app.get("/debug/profiles")
+def get_profiles(request: Request):
+    """Request profiles kept in the retention ring, newest first"""
+    _check_profile_token(request)
+    return profiling.list_profiles()
+
+@app.get("/debug/profiles/{profile_id}")
+def get_profile(profile_id: int, request: Request, format: str = "folded"):
+    """One profile as collapsed stacks (for flame graphs) or as a top-functions summary"""
+    _check_profile_token(request)
+    profile = profiling.get_profile(profile_id)
+    if profile is None:
+        raise HTTPException(status_code=404, detail="Profile not found (it may have been rotated out)")
+    if format == "summary":
+        return profiling.summary(profile)
+    return PlainTextResponse(profiling.folded(profile), headers={
+        "Content-Disposition": f'attachment; filename="profile_{profile_id}.folded"'
+    })
+
 @app.get("/latest-uid")
 def get_latest_scanned_uid():
     """Get the latest UID scanned by the RFID reader"""
@@ -1,17 +1,16 @@
-import sqlite3
 from mfrc522 import SimpleMFRC522
 import RPi.GPIO as GPIO
 from datetime import datetime
-import os
 import time
+from scripts.config import settings
+from scripts.db import connect
 
 # Setup
-BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-DB_PATH = os.path.join(BASE_DIR, "database", "students.db")
+DB_PATH = settings["db_path"]
 reader = SimpleMFRC522()
 
-# Buzzer on GPIO 18 (Pin 12)
-BUZZER_PIN = 18
+# Buzzer on GPIO 18 (Pin 12) unless configured otherwise
+BUZZER_PIN = settings["buzzer_pin"]
 if GPIO.getmode() is None:
     GPIO.setmode(GPIO.BCM)
 GPIO.setup(BUZZER_PIN, GPIO.OUT)
@@ -29,7 +28,7 @@ try:
         uid, _ = reader.read()
         uid = str(uid)
 
-        conn = sqlite3.connect(DB_PATH)
+        conn = connect(DB_PATH)
         cursor = conn.cursor()
 
         # Look up student
@@ -87,7 +86,7 @@ try:
 
         conn.close()
         print("-----\n")
-        time.sleep(1.5)
+        time.sleep(settings["scan_cooldown"])
 
 except KeyboardInterrupt:
     print("\n🛑 Attendance logging stopped.")
@@ -13,11 +13,21 @@
  */
 
 // ======= Global Configuration =======
-const API_BASE_URL = 'http://192.168.21.202:8000';
-const REFRESH_INTERVAL = 5000; // 10 seconds
+// Deployment settings come from js/config.js, generated from config.json by scripts/config.py.
+// Without an explicit API URL the API is expected on the host that served this page.
+const APP_CONFIG = window.RFID_CONFIG || {};
+const API_BASE_URL = APP_CONFIG.apiBaseUrl ||
+    `${location.protocol === 'https:' ? 'https' : 'http'}://${location.hostname || 'localhost'}:${APP_CONFIG.apiPort || 8000}`;
+const REFRESH_INTERVAL = APP_CONFIG.refreshIntervalMs || 5000;
+const UID_POLL_INTERVAL = APP_CONFIG.uidPollIntervalMs || 1000;
+const SEARCH_DEBOUNCE = 200; // ms of typing pause before the registry search is sent
+const SEARCH_LIMIT = 200;
+const STUDENTS_PAGE_SIZE = 100; // registry rows fetched per "Load more"
+const STUDENT_FIELDS = 'uid,name,reg_no,department,year,section'; // everything the tables use; not the photo
 
 // ======= Global State =======
 let studentsData = [];
+let distribution = null; // GET /stats/distribution: the counts the stat cards and charts are drawn from
 let attendanceData = [];
 let todayAttendanceData = [];
 let refreshTimer;
@@ -26,6 +36,9 @@ let currentPage = 1;
 const pageSize = 25;
 let departmentChart = null;
 let attendanceTrendChart = null;
+let searchTimer = null;
+let searchController = null;
+let studentsCursor = null; // X-Next-Cursor of the last registry page, null once the roster is exhausted
 
 // ======= DOM Elements =======
 document.addEventListener('DOMContentLoaded', () => {
@@ -113,13 +126,14 @@ function updateDateTime() {
  * Loads all data needed for the dashboard
  */
 function loadDashboardData() {
-    // Load students data
-    fetch(`${API_BASE_URL}/students`)
+    // Load the per-year/department/status counts for the stat cards and charts
+    loadDistribution();
+
+    // Load students data (the attendance logs look students up in it)
+    fetch(`${API_BASE_URL}/students?fields=${STUDENT_FIELDS}`)
         .then(response => response.json())
         .then(data => {
             studentsData = data;
-            updateStudentStats();
-            updateDepartmentChart();
         })
         .catch(error => {
             showNotification('Error loading students data');
@@ -141,11 +155,27 @@ function loadDashboardData() {
         });
 }
 
+/**
+ * Loads the student and attendance counts; the server caches them, so this is cheap to refresh
+ */
+function loadDistribution() {
+    fetch(`${API_BASE_URL}/stats/distribution`)
+        .then(response => response.json())
+        .then(data => {
+            distribution = data;
+            updateStudentStats();
+            updateDepartmentChart();
+        })
+        .catch(error => {
+            console.error('Error fetching distribution:', error);
+        });
+}
+
 /**
  * Loads today's attendance data
  */
 function loadTodayAttendance() {
-    fetch(`${API_BASE_URL}/attendance/today`)
+    fetch(`${API_BASE_URL}/attendance/today?include_student=true`)
         .then(response => response.json())
         .then(data => {
             todayAttendanceData = data;
@@ -162,7 +192,7 @@ function loadTodayAttendance() {
  * Updates the student statistics cards
  */
 function updateStudentStats() {
-    document.getElementById('total-students').textContent = studentsData.length;
+    document.getElementById('total-students').textContent = distribution ? distribution.total_students : 0;
     
     // Update attendance rate calculation
     updateAttendanceStats();
@@ -172,10 +202,12 @@ function updateStudentStats() {
  * Updates the attendance statistics based on today's data
  */
 function updateAttendanceStats() {
-    const presentToday = todayAttendanceData.length;
+    const presentToday = distribution
+        ? distribution.attendance.by_status.Present || 0
+        : todayAttendanceData.filter(record => record.status === 'Present').length;
     document.getElementById('present-today').textContent = presentToday;
     
-    const totalStudents = studentsData.length;
+    const totalStudents = distribution ? distribution.total_students : 0;
     const attendanceRate = totalStudents > 0 ? Math.round((presentToday / totalStudents) * 100) : 0;
     document.getElementById('attendance-rate').textContent = `${attendanceRate}%`;
     
@@ -207,17 +239,15 @@ function updateTodayAttendanceTable() {
         return;
     }
     
-    // Merge with student data to get additional fields
+    // Student fields come pre-joined from /attendance/today?include_student=true
     todayAttendanceData.forEach(record => {
-        const student = studentsData.find(s => s.uid === record.uid) || {};
-        
         const row = document.createElement('tr');
         row.innerHTML = `
             <td>${record.name}</td>
-            <td>${student.reg_no || 'N/A'}</td>
-            <td>${student.section || 'N/A'}</td>
-            <td>${student.year || 'N/A'}</td>
-            <td>${student.department || 'N/A'}</td>
+            <td>${record.reg_no || 'N/A'}</td>
+            <td>${record.section || 'N/A'}</td>
+            <td>${record.year || 'N/A'}</td>
+            <td>${record.department || 'N/A'}</td>
             <td>${record.time}</td>
             <td class="status-${record.status.toLowerCase()}">${record.status}</td>
         `;
@@ -229,23 +259,16 @@ function updateTodayAttendanceTable() {
  * Creates or updates the year-wise student distribution chart
  */
 function updateDepartmentChart() {
-    if (!studentsData.length) return;
+    if (!distribution || !distribution.total_students) return;
     
-    // Get all student counts by year
+    // Student counts by year, counted by the server
     const yearCounts = {
-        '1': 0,
-        '2': 0,
-        '3': 0,
-        '4': 0
+        '1': distribution.by_year['1'] || 0,
+        '2': distribution.by_year['2'] || 0,
+        '3': distribution.by_year['3'] || 0,
+        '4': distribution.by_year['4'] || 0
     };
     
-    // Count students in each year
-    studentsData.forEach(student => {
-        if (student.year && yearCounts.hasOwnProperty(student.year)) {
-            yearCounts[student.year]++;
-        }
-    });
-    
     const yearLabels = {
         '1': '1st Year',
         '2': '2nd Year',
@@ -472,18 +495,46 @@ function formatDateLabel(dateStr) {
 }
 
 /**
- * Loads the student registry data
+ * Loads the student registry data; with a search term or filter set, the server does the
+ * searching (GET /students/search) so the full roster isn't filtered in the browser.
+ * Otherwise the roster is read a page at a time, sorted by name. Pass the cursor (for a
+ * search, the number of results already shown) to append the next page
  */
-function loadStudentsData() {
-    if (studentsData.length) {
-        renderStudentsTable(studentsData);
-    } else {
-        fetch(`${API_BASE_URL}/students`)
+function loadStudentsData(cursor = null) {
+    const year = document.getElementById('year-filter').value;
+    const section = document.getElementById('section-filter').value;
+    const searchTerm = document.getElementById('student-search').value.trim();
+
+    if (year || section || searchTerm) {
+        const offset = cursor || 0;
+        const params = new URLSearchParams({ limit: SEARCH_LIMIT, offset });
+        if (searchTerm) params.set('q', searchTerm);
+        if (year) params.set('year', year);
+        if (section) params.set('section', section);
+
+        // Only the latest search matters; drop any still in flight
+        if (searchController) searchController.abort();
+        searchController = new AbortController();
+        fetch(`${API_BASE_URL}/students/search?${params}`, { signal: searchController.signal })
             .then(response => response.json())
             .then(data => {
-                studentsData = data;
-                renderStudentsTable(data);
+                studentsCursor = data.truncated ? offset + data.results.length : null;
+                renderStudentsTable(data.results, offset > 0);
             })
+            .catch(error => {
+                if (error.name === 'AbortError') return;
+                showNotification('Error searching students');
+                console.error('Error searching students:', error);
+            });
+    } else {
+        const params = new URLSearchParams({ sort: 'name', limit: STUDENTS_PAGE_SIZE, fields: STUDENT_FIELDS });
+        if (cursor) params.set('cursor', cursor);
+        fetch(`${API_BASE_URL}/students?${params}`)
+            .then(response => {
+                studentsCursor = response.headers.get('X-Next-Cursor');
+                return response.json();
+            })
+            .then(data => renderStudentsTable(data, Boolean(cursor)))
             .catch(error => {
                 showNotification('Error loading students data');
                 console.error('Error fetching students:', error);
@@ -492,24 +543,16 @@ function loadStudentsData() {
 }
 
 /**
- * Renders the students table with filter functionality
+ * Renders the students table (already filtered by the server when a search is active);
+ * with append set, the rows are added below the current page instead of replacing it
  */
-function renderStudentsTable(data) {
+function renderStudentsTable(data, append = false) {
     const tableBody = document.getElementById('students-table-body');
-    tableBody.innerHTML = '';
+    const loadMoreRow = document.getElementById('students-load-more');
+    if (loadMoreRow) loadMoreRow.remove();
+    if (!append) tableBody.innerHTML = '';
     
-    // Apply filters
-    const yearFilter = document.getElementById('year-filter').value;
-    const sectionFilter = document.getElementById('section-filter').value;
-    const searchTerm = document.getElementById('student-search').value.toLowerCase();
-    
-    const filteredData = data.filter(student => {
-        return (!yearFilter || student.year === yearFilter) && 
-               (!sectionFilter || (student.section && student.section.includes(sectionFilter))) &&
-               (!searchTerm || 
-                student.name.toLowerCase().includes(searchTerm) || 
-                (student.reg_no && student.reg_no.toLowerCase().includes(searchTerm)));
-    });
+    const filteredData = data;
     
     // Add table style for avatar column if not already added
     if (!document.getElementById('student-avatar-styles')) {
@@ -542,7 +585,7 @@ function renderStudentsTable(data) {
         document.head.appendChild(style);
     }
     
-    if (filteredData.length === 0) {
+    if (filteredData.length === 0 && !append) {
         const emptyRow = document.createElement('tr');
         emptyRow.innerHTML = `<td colspan="7" style="text-align: center;">No students found</td>`;
         tableBody.appendChild(emptyRow);
@@ -584,23 +627,27 @@ function renderStudentsTable(data) {
             </td>
         `;
         tableBody.appendChild(row);
-    });
-    
-    // Add event listeners to buttons
-    document.querySelectorAll('.delete-btn').forEach(button => {
-        button.addEventListener('click', function() {
+
+        // Add event listeners to this row's buttons (earlier pages already have theirs)
+        row.querySelector('.delete-btn').addEventListener('click', function() {
             const uid = this.getAttribute('data-uid');
             const name = this.getAttribute('data-name');
             confirmDeleteStudent(uid, name);
         });
-    });
-    
-    document.querySelectorAll('.view-btn').forEach(button => {
-        button.addEventListener('click', function() {
+        
+        row.querySelector('.view-btn').addEventListener('click', function() {
             const uid = this.getAttribute('data-uid');
             viewStudentDetails(uid);
         });
     });
+
+    if (studentsCursor) {
+        const moreRow = document.createElement('tr');
+        moreRow.id = 'students-load-more';
+        moreRow.innerHTML = `<td colspan="7" style="text-align: center;"><button class="view-btn"><i class="fas fa-chevron-down"></i> Load more</button></td>`;
+        moreRow.querySelector('button').addEventListener('click', () => loadStudentsData(studentsCursor));
+        tableBody.appendChild(moreRow);
+    }
 }
 
 /**
@@ -712,7 +759,10 @@ function setupFilterListeners() {
         if (element) {
             element.addEventListener('change', () => loadStudentsData());
             if (id === 'student-search') {
-                element.addEventListener('keyup', () => loadStudentsData());
+                element.addEventListener('keyup', () => {
+                    clearTimeout(searchTimer);
+                    searchTimer = setTimeout(() => loadStudentsData(), SEARCH_DEBOUNCE);
+                });
             }
         }
     });
@@ -1010,6 +1060,7 @@ function startAutoRefresh() {
     // Set up new refresh timer
     refreshTimer = setInterval(() => {
         loadTodayAttendance();
+        loadDistribution();
     }, REFRESH_INTERVAL);
     
     // Update countdown display
@@ -1104,6 +1155,28 @@ function setupModalControls() {
         closeModal('student-details-modal');
         confirmDeleteStudent(uid, name);
     });
+
+    // Set up photo upload from details; the chosen file is sent as the raw request body
+    document.getElementById('student-photo-input').addEventListener('change', function() {
+        const file = this.files[0];
+        const uid = document.getElementById('detail-uid').textContent;
+        this.value = '';
+        if (!file) return;
+        fetch(`${API_BASE_URL}/students/${uid}/photo`, {
+            method: 'PUT',
+            headers: { 'Content-Type': file.type || 'application/octet-stream' },
+            body: file
+        })
+            .then(response => response.json().then(data => {
+                if (!response.ok) throw new Error(data.detail || `Error ${response.status}`);
+                showNotification('Photo updated');
+                fetchAndDisplayStudentDetails(uid);
+            }))
+            .catch(error => {
+                console.error('Error uploading photo:', error);
+                showNotification(`Error uploading photo: ${error.message}`, true);
+            });
+    });
 }
 
 /**
@@ -1260,7 +1333,7 @@ function setupRegistrationForm() {
                     pollingInterval = null;
                     this.disabled = false;
                 });
-        }, 1000);
+        }, UID_POLL_INTERVAL);
         
         // Stop polling after 30 seconds if no card detected
         setTimeout(() => {
@@ -1410,7 +1483,8 @@ function fetchAndDisplayStudentDetails(uid) {
             // Update student profile image if elements exist
             if (profileImgEl && initialsAvatarEl) {
                 if (student.image_url) {
-                    profileImgEl.src = student.image_url;
+                    // Photo URLs are content-hashed and cached for good; the 256px thumbnail fits the modal
+                    profileImgEl.src = `${API_BASE_URL}${student.thumbnails['256'] || student.image_url}`;
                     profileImgEl.alt = `${student.name}'s profile picture`;
                     profileImgEl.style.display = 'block';
                     initialsAvatarEl.style.display = 'none';
@@ -1518,8 +1592,7 @@ function deleteStudent(uid, name) {
         
         // If on dashboard, also update stats and charts
         if (document.getElementById('dashboard').classList.contains('active')) {
-            updateStudentStats();
-            updateDepartmentChart();
+            loadDistribution();
         }
     })
     .catch(error => {
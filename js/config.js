@@ -0,0 +1,7 @@
+// Generated by `python3 scripts/config.py --write-js`; edit config.json instead
+window.RFID_CONFIG = {
+    "apiBaseUrl": "",
+    "apiPort": 8000,
+    "refreshIntervalMs": 5000,
+    "uidPollIntervalMs": 1000
+};
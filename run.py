@@ -1,37 +1,55 @@
 import subprocess
 import os
-import sqlite3
-from time import sleep
+import sys
 
-DB_PATH = "database/students.db"
+# ---------- Single-process mode: python3 run.py --single ----------
+# No prompts and no child interpreters: uvicorn serves the API and runs the scanner on a
+# background thread, so the device takes scans as soon as one interpreter has started
+SINGLE = "--single" in sys.argv[1:]
+if SINGLE:
+    os.environ["RFID_EMBEDDED_SCANNER"] = "1"
+    os.environ["RFID_API_WORKERS"] = "1"
+
+from scripts.config import settings
+
+DB_PATH = settings["db_path"]
+API_PORT = settings["api_port"]
+
+if SINGLE:
+    import uvicorn
+    print(f"🚀 Launching API + scanner in one process at http://0.0.0.0:{API_PORT} ...")
+    uvicorn.run("api.main:app", host="0.0.0.0", port=API_PORT)
+    sys.exit(0)
+
+from scripts.supervisor import Component, heartbeat_probe, http_probe, python_command, supervise
 
 # ---------- 1. Check if DB exists ----------
 if not os.path.exists(DB_PATH):
     print("📦 Database not found. Creating new database...")
-    subprocess.run(["python3", "scripts/create_db.py"])
+    subprocess.run([sys.executable, "scripts/create_db.py"])
 
 # ---------- 2. Ask if admin wants to register a new student ----------
-try:
-    choice = input("➕ Do you want to register a new student? (y/n): ").strip().lower()
-    if choice == 'y':
-        subprocess.run(["python3", "scripts/register_student.py"])
-except Exception as e:
-    print(f"⚠️ Error during registration: {e}")
-
-# ---------- 3. Start FastAPI server in background ----------
-print("🚀 Launching FastAPI backend at http://0.0.0.0:8000 ...")
-uvicorn_process = subprocess.Popen(
-    ["uvicorn", "api.main:app", "--host", "0.0.0.0", "--port", "8000"]
-)
-
-sleep(2)
-
-# ---------- 4. Start attendance logging ----------
-try:
-    print("\n🟢 Starting attendance scanner...\n")
-    subprocess.run(["python3", "scripts/attendance_logger.py"])
-except KeyboardInterrupt:
-    print("\n🛑 Attendance scanner stopped.")
-finally:
-    print("🧹 Cleaning up...")
-    uvicorn_process.terminate()
+if "--no-prompt" not in sys.argv[1:]:
+    try:
+        choice = input("➕ Do you want to register a new student? (y/n): ").strip().lower()
+        if choice == 'y':
+            subprocess.run([sys.executable, "scripts/register_student.py"])
+    except Exception as e:
+        print(f"⚠️ Error during registration: {e}")
+
+# ---------- 3. Start the API and the scanner side by side and keep them running ----------
+# api_workers=4 runs one uvicorn worker per core (the database is in WAL mode, so
+# workers read concurrently and wait their turn to write)
+workers = str(settings["api_workers"])
+components = [
+    Component("api", [sys.executable, "-m", "uvicorn", "api.main:app", "--host", "0.0.0.0",
+                      "--port", str(API_PORT), "--workers", workers],
+              http_probe(f"http://127.0.0.1:{API_PORT}/")),
+    Component("logger", python_command("scripts/attendance_logger.py"), heartbeat_probe("logger")),
+]
+if settings["node_id"] and settings["sync_url"]:
+    components.append(Component("sync", python_command("scripts/sync_agent.py"), heartbeat_probe("sync", 900)))
+
+print(f"🚀 Launching FastAPI backend at http://0.0.0.0:{API_PORT} with {workers} worker(s) and the attendance scanner...")
+print("   Press Ctrl+C to stop everything.\n")
+supervise(components)
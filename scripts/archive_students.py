@@ -0,0 +1,105 @@
+import os
+import sys
+from datetime import datetime
+
+# Get absolute DB path
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BASE_DIR)
+
+from scripts.config import settings
+from scripts.db import connect
+from scripts.attendance_partitions import remove_from_partitions
+
+DB_PATH = settings["db_path"]
+
+
+def archive_students(conn, uids=None, section=None, year=None, purge=False):
+    """Move students matching every given filter, plus their attendance, into the archive tables.
+
+    Attendance in sealed partitions is moved first, one partition at a time; the hot table and
+    the students then go in one transaction. With purge=True the rows are deleted instead of archived.
+    Returns the number of student and attendance rows moved.
+    """
+    if not uids and not section and not year:
+        raise ValueError("Give at least one of uids, section or year")
+
+    cursor = conn.cursor()
+    cursor.execute("BEGIN IMMEDIATE")
+    try:
+        cursor.execute("CREATE TEMP TABLE IF NOT EXISTS archive_target (uid TEXT PRIMARY KEY)")
+        cursor.execute("DELETE FROM archive_target")
+
+        conditions = []
+        params = []
+        if uids:
+            cursor.execute("CREATE TEMP TABLE IF NOT EXISTS archive_uids (uid TEXT PRIMARY KEY)")
+            cursor.execute("DELETE FROM archive_uids")
+            cursor.executemany("INSERT OR IGNORE INTO archive_uids (uid) VALUES (?)", [(str(uid),) for uid in uids])
+            conditions.append("uid IN (SELECT uid FROM archive_uids)")
+        if section:
+            conditions.append("section = ?")
+            params.append(section)
+        if year:
+            conditions.append("year = ?")
+            params.append(year)
+
+        cursor.execute(f"INSERT INTO archive_target SELECT uid FROM students WHERE {' AND '.join(conditions)}", params)
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+
+    # Sealed partitions first: if this stops half way, the students are still there to archive again
+    archived_at = None if purge else datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    partition_count = remove_from_partitions(conn, "archive_target", archived_at)
+
+    cursor.execute("BEGIN IMMEDIATE")
+    try:
+        if not purge:
+            cursor.execute('''
+                INSERT INTO students_archive (uid, name, reg_no, department, year, section, image, archived_at)
+                SELECT uid, name, reg_no, department, year, section, image, ?
+                FROM students WHERE uid IN (SELECT uid FROM archive_target)
+            ''', (archived_at,))
+            cursor.execute('''
+                INSERT INTO attendance_archive (uid, name, date, time, status, archived_at)
+                SELECT uid, name, date, time, status, ?
+                FROM attendance WHERE uid IN (SELECT uid FROM archive_target)
+            ''', (archived_at,))
+
+        cursor.execute("DELETE FROM attendance WHERE uid IN (SELECT uid FROM archive_target)")
+        attendance_count = cursor.rowcount
+        cursor.execute("DELETE FROM students WHERE uid IN (SELECT uid FROM archive_target)")
+        student_count = cursor.rowcount
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+
+    return student_count, attendance_count + partition_count
+
+
+if __name__ == "__main__":
+    print("\n🗄️ Archive Students")
+    section = input("🏫 Enter section (e.g., A) or leave blank: ").strip() or None
+    year = input("📘 Enter year (e.g., 4) or leave blank: ").strip() or None
+    uid_list = input("🔗 Enter comma-separated UIDs or leave blank: ").strip()
+    uids = [uid.strip() for uid in uid_list.split(",") if uid.strip()] or None
+
+    if not (section or year or uids):
+        print("❌ Give a section, year or list of UIDs.")
+    else:
+        mode = input("🗑️ Delete permanently instead of archiving? (y/n): ").strip().lower()
+        confirm = input("\n⚠️ Are you sure you want to remove these students from the system? (y/n): ").strip().lower()
+        if confirm == 'y':
+            conn = connect(DB_PATH)
+            try:
+                students, records = archive_students(conn, uids, section, year, purge=(mode == 'y'))
+                action = "Deleted" if mode == 'y' else "Archived"
+                print(f"\n✅ {action} {students} student(s) and {records} attendance record(s).")
+            except Exception as e:
+                print(f"❌ Error: {e}")
+            finally:
+                conn.close()
+        else:
+            print("❎ Archiving cancelled.")
@@ -1,75 +1,337 @@
-import sqlite3
-from mfrc522 import SimpleMFRC522
-import RPi.GPIO as GPIO
 from datetime import datetime
 import os
+import queue
+import sqlite3
+import sys
+import threading
 import time
-from scanner_event_queue import set_latest_uid
 
 # Setup paths
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-DB_PATH = os.path.join(BASE_DIR, "database", "students.db")
-
-# RFID Reader
-reader = SimpleMFRC522()
-
-# Buzzer on GPIO 18
-BUZZER_PIN = 18
-GPIO.setwarnings(False)
-GPIO.cleanup()  # ✅ Ensures GPIO is not blocked
-GPIO.setmode(GPIO.BCM)
-GPIO.setup(BUZZER_PIN, GPIO.OUT)
-
-def beep(duration=0.3):
-    print(f"[BEEP] for {duration}s")
-    GPIO.output(BUZZER_PIN, GPIO.HIGH)
-    time.sleep(duration)
-    GPIO.output(BUZZER_PIN, GPIO.LOW)
-
-print("\n📲 Attendance Logger Started. Press Ctrl+C to stop.\n")
-
-try:
-    while True:
-        print("📡 Waiting for RFID scan...")
-        uid, _ = reader.read()
-        beep(0.15)  # ✅ Instant feedback
-        uid = str(uid)
-
-        conn = sqlite3.connect(DB_PATH)
-        cursor = conn.cursor()
-
-        cursor.execute("SELECT name FROM students WHERE uid = ?", (uid,))
-        result = cursor.fetchone()
-
-        if result:
-            name = result[0]
-            now = datetime.now()
-            date = now.strftime("%Y-%m-%d")
-            time_now = now.strftime("%H:%M:%S")
-
-            cursor.execute("SELECT * FROM attendance WHERE uid = ? AND date = ?", (uid, date))
-            if cursor.fetchone():
-                print(f"🟡 {name} already marked present today.")
-                beep(0.2)
+sys.path.insert(0, BASE_DIR)
+
+from scripts.config import settings
+from scripts.scanner_event_queue import set_latest_uid
+from scripts.hardware import (get_reader, get_buzzer, load_roster_uids, release_gpio, BuzzerScheduler, BACKEND,
+                              BUZZER_PIN, SIM_RATE)
+from scripts.db import connect
+from scripts.sync import NODE_ID, SYNC_URL, queue_scan, roster_loop
+from scripts import metrics
+from scripts.supervisor import touch_heartbeat
+
+DB_PATH = settings["db_path"]
+
+# Pause after each scan so a card left on the reader isn't read again immediately
+SCAN_COOLDOWN = settings["scan_cooldown"]
+
+# Card polling interval: back to the minimum after every read, stretched by POLL_BACKOFF
+# on each empty poll up to the maximum, so the reader is polled quickly during a rush and
+# rarely when the room is empty
+POLL_MIN = settings["poll_min_ms"] / 1000
+POLL_MAX = settings["poll_max_ms"] / 1000
+POLL_BACKOFF = 1.5
+
+# Readers to serve, e.g. "0:0:25:18,0:1:24:23" (bus:device:pin_rst:buzzer_pin per door)
+READERS = settings["readers"]
+
+# How often the logger publishes its metrics for the API's /metrics endpoint
+METRICS_INTERVAL = 1.0
+
+scan_stage = metrics.histogram("rfid_scan_stage_seconds", "Time spent in each scan pipeline stage", ("stage",))
+scans_total = metrics.counter("rfid_scans_total", "Scans handled by outcome", ("outcome",))
+queue_depth = metrics.gauge("rfid_scanner_queue_depth", "Card reads waiting to be handled")
+door_reads = metrics.counter("rfid_door_reads_total", "Cards read per door", ("door",))
+polls = metrics.counter("rfid_reader_polls_total", "Non-blocking reader polls by result", ("door", "result"))
+poll_interval = metrics.gauge("rfid_reader_poll_interval_seconds", "Current poll interval per door", ("door",))
+poll_cpu = metrics.counter("rfid_reader_cpu_seconds_total", "CPU time spent on each door's polling thread", ("door",))
+detect_latency = metrics.histogram("rfid_card_detect_seconds",
+                                   "Card arrival to detection (upper bound: time since the previous poll)", ("door",))
+process_cpu = metrics.gauge("rfid_logger_cpu_percent", "Logger process CPU usage over the last publish interval")
+heartbeat = metrics.gauge("rfid_logger_heartbeat_timestamp", "Unix time of the logger's last housekeeping pass")
+
+
+def handle_scan(conn, uid):
+    """Mark one scanned card present. Returns "present", "duplicate" or "unknown"."""
+    started = time.perf_counter()
+    cursor = conn.cursor()
+    cursor.execute("SELECT name FROM students WHERE uid = ?", (uid,))
+    result = cursor.fetchone()
+
+    if result:
+        name = result[0]
+        now = datetime.now()
+        date = now.strftime("%Y-%m-%d")
+        time_now = now.strftime("%H:%M:%S")
+
+        cursor.execute("SELECT 1 FROM attendance WHERE uid = ? AND date = ?", (uid, date))
+        duplicate = cursor.fetchone()
+        written = time.perf_counter()
+        scan_stage.observe(written - started, stage="lookup")
+        if duplicate:
+            print(f"🟡 {name} already marked present today.")
+            return "duplicate"
+
+        cursor.execute('''
+            INSERT INTO attendance (uid, name, date, time, status)
+            VALUES (?, ?, ?, ?, ?)
+        ''', (uid, name, date, time_now, "Present"))
+        if NODE_ID:
+            queue_scan(cursor, uid, name, date, time_now, "Present")
+        conn.commit()
+        scan_stage.observe(time.perf_counter() - written, stage="write")
+        print(f"✅ {name} marked present at {time_now} on {date}")
+        return "present"
+
+    written = time.perf_counter()
+    scan_stage.observe(written - started, stage="lookup")
+    print("❌ Unregistered card detected. Sending to frontend...")
+    set_latest_uid(uid)
+    scan_stage.observe(time.perf_counter() - written, stage="write")
+    return "unknown"
+
+
+class Scan:
+    """One card read, handed from a door's reader thread to the writer and back."""
+
+    def __init__(self, door, uid):
+        self.door = door
+        self.uid = uid
+        self.outcome = None
+        self.done = threading.Event()
+
+
+def parse_doors(spec=READERS):
+    """RFID_READERS format: comma-separated "bus:device:pin_rst:buzzer_pin" entries.
+
+    Trailing fields may be left out (pin_rst then defaults to RST_PIN, GPIO 25, and the buzzer
+    uses BUZZER_PIN). An empty spec means one reader on SPI 0.0.
+    """
+    doors = []
+    for index, entry in enumerate(filter(None, (part.strip() for part in spec.split(","))), 1):
+        fields = [int(field) if field else None for field in entry.split(":")] + [None] * 4
+        bus, device, pin_rst, buzzer_pin = fields[:4]
+        doors.append({"name": f"door{index}", "bus": bus or 0, "device": device or 0,
+                      "pin_rst": pin_rst, "buzzer_pin": buzzer_pin or BUZZER_PIN})
+    return doors or [{"name": "door1", "bus": 0, "device": 0, "pin_rst": None, "buzzer_pin": BUZZER_PIN}]
+
+
+def poll_card(name, reader, stop_event, interval):
+    """Poll the reader without blocking until a card shows up.
+
+    Returns (uid, interval to resume with), or (None, interval) once stop_event is set.
+    Raises EOFError when a simulated reader runs dry.
+    """
+    cpu_started = time.thread_time()
+    last_poll = time.time()
+    while not stop_event.is_set():
+        polled_at = time.time()
+        uid, _ = reader.read_no_block()
+        if uid:
+            # Simulated readers know when the card arrived; real ones only bound it by the previous poll
+            arrived = getattr(reader, "last_tap_time", None)
+            if arrived is not None:
+                detect_latency.observe(max(0.0, time.monotonic() - arrived), door=name)
             else:
-                cursor.execute('''
-                    INSERT INTO attendance (uid, name, date, time, status)
-                    VALUES (?, ?, ?, ?, ?)
-                ''', (uid, name, date, time_now, "Present"))
-                conn.commit()
-                print(f"✅ {name} marked present at {time_now} on {date}")
-                beep(0.5)
-        else:
-            print("❌ Unregistered card detected. Sending to frontend...")
-            set_latest_uid(uid)
-            beep(0.3)
+                detect_latency.observe(polled_at - last_poll, door=name)
+            polls.inc(door=name, result="card")
+            poll_cpu.inc(time.thread_time() - cpu_started, door=name)
+            return uid, POLL_MIN
+        polls.inc(door=name, result="empty")
+        last_poll = polled_at
+        interval = min(POLL_MAX, interval * POLL_BACKOFF)
+        poll_interval.set(interval, door=name)
+        stop_event.wait(interval)
+    poll_cpu.inc(time.thread_time() - cpu_started, door=name)
+    return None, interval
+
+
+def door_loop(name, reader, feedback, scans, cooldown, stop_event):
+    """Read cards on one door and wait for the writer's verdict before giving feedback."""
+    interval = POLL_MIN
+    while not stop_event.is_set():
+        print(f"📡 [{name}] Waiting for RFID scan...")
+        started = time.perf_counter()
+        try:
+            uid, interval = poll_card(name, reader, stop_event, interval)
+        except EOFError:
+            break
+        except Exception as e:
+            print(f"⚠️ [{name}] Reader error: {e}")
+            feedback.play("error")
+            stop_event.wait(1)
+            continue
+        if uid is None:
+            break
+        read_done = time.perf_counter()
+        scan_stage.observe(read_done - started, stage="read")
+        door_reads.inc(door=name)
+        feedback.play("ack")  # ✅ Instant feedback
+
+        scan = Scan(name, str(uid))
+        scans.put(scan)
+        scan.done.wait()
+        if scan.outcome is None:
+            break  # the writer has stopped
+        feedback.play(scan.outcome)
 
-        conn.close()
         print("-----\n")
-        time.sleep(1.5)
+        stop_event.wait(cooldown)
+
+
+def run_doors(doors, db_path=DB_PATH, cooldown=SCAN_COOLDOWN, stop_event=None, on_scan=None, publish_as="logger"):
+    """Serve every (name, reader, buzzer) door until interrupted, all readers run dry or stop_event is set.
+
+    Each door reads on its own thread and hands its beeps to a BuzzerScheduler; one writer owns
+    the database connection and marks scans in arrival order, so a student tapping at two doors
+    is only marked once. on_scan(uid, outcome) is called as soon as a scan has been committed,
+    before its beep. Metrics are published for the API under `publish_as` (None when running
+    inside the API process, whose /metrics already sees them).
+    """
+    stop_event = stop_event or threading.Event()
+    scans = queue.Queue()
+    schedulers = [BuzzerScheduler(buzzer, name=f"buzzer-{name}") for name, _, buzzer in doors]
+    threads = [threading.Thread(target=door_loop, args=(name, reader, feedback, scans, cooldown, stop_event),
+                                name=f"reader-{name}", daemon=True)
+               for (name, reader, _), feedback in zip(doors, schedulers)]
+    for thread in threads:
+        thread.start()
+
+    readers = [reader for _, reader, _ in doors]
+    conn = connect(db_path)
+    present_today = (None, set())
+    # Backdated so the first pass runs straight away and the supervisor sees the heartbeat early
+    published = (time.monotonic() - METRICS_INTERVAL, time.process_time())
+    scan = None
+
+    def housekeeping():
+        """Runs between scans as well as after them: heartbeat, CPU usage and metrics publishing."""
+        nonlocal published
+        now, cpu = time.monotonic(), time.process_time()
+        if now - published[0] < METRICS_INTERVAL:
+            return
+        process_cpu.set(round(100 * (cpu - published[1]) / (now - published[0]), 2))
+        heartbeat.set(time.time())
+        touch_heartbeat("logger")
+        queue_depth.set(scans.qsize() + sum(getattr(reader, "queue_depth", 0) for reader in readers))
+        if metrics.ENABLED and publish_as:
+            metrics.write_state(publish_as)
+        published = (now, cpu)
+
+    try:
+        while not stop_event.is_set():
+            housekeeping()
+            try:
+                scan = scans.get(timeout=0.2)
+            except queue.Empty:
+                if not any(thread.is_alive() for thread in threads):
+                    break
+                continue
+
+            today = datetime.now().strftime("%Y-%m-%d")
+            if present_today[0] != today:
+                present_today = (today, set())
+            if scan.uid in present_today[1]:
+                # Already handled at this or another door today; no need to touch the database
+                print(f"🟡 [{scan.door}] {scan.uid} already marked present today.")
+                outcome = "duplicate"
+            else:
+                try:
+                    outcome = handle_scan(conn, scan.uid)
+                except sqlite3.Error as e:
+                    conn.rollback()
+                    print(f"⚠️ [{scan.door}] Could not record {scan.uid}: {e}")
+                    outcome = "error"
+                if outcome in ("present", "duplicate"):
+                    present_today[1].add(scan.uid)
+            if on_scan:
+                on_scan(scan.uid, outcome)
+            scan.outcome = outcome
+            scan.done.set()
+            scan = None
+
+            scans_total.inc(outcome=outcome)
+    finally:
+        stop_event.set()
+        conn.close()
+        # Release any door still waiting on a verdict
+        if scan is not None:
+            scan.done.set()
+        while not scans.empty():
+            scans.get_nowait().done.set()
+        for thread in threads:
+            thread.join(timeout=1)
+        for feedback in schedulers:
+            feedback.close()
+
+
+def run(reader, buzzer, db_path=DB_PATH, cooldown=SCAN_COOLDOWN, stop_event=None, on_scan=None):
+    """Single-door run_doors()."""
+    run_doors([("door1", reader, buzzer)], db_path, cooldown, stop_event, on_scan)
+
+
+def open_doors(spec=READERS):
+    """Create the buzzer and reader for every configured door; pins are numbered BCM throughout."""
+    doors = parse_doors(spec)
+    buzzers = [get_buzzer(pin=door["buzzer_pin"]) for door in doors]
+    uids = load_roster_uids() if BACKEND == "simulated" and len(doors) > 1 else None
+    opened = []
+    for index, (door, buzzer) in enumerate(zip(doors, buzzers)):
+        if uids is not None:
+            # Simulated doors share the roster between them instead of each seeing every student
+            reader = get_reader(uids=uids[index::len(doors)], rate=SIM_RATE / len(doors))
+        else:
+            reader = get_reader(bus=door["bus"], device=door["device"], pin_rst=door["pin_rst"])
+        opened.append((door["name"], reader, buzzer))
+    return opened
+
+
+def close_doors(doors):
+    """Silence every buzzer and close every reader, then reset GPIO once for all of them."""
+    for _, reader, buzzer in doors:
+        buzzer.cleanup(release=False)
+        reader.close(release=False)
+    release_gpio()
+
+
+def start_roster_sync(db_path=DB_PATH, stop_event=None):
+    if NODE_ID and SYNC_URL:
+        # Edge node: keep the local roster in step with the central server for offline UID lookups
+        threading.Thread(target=roster_loop, args=(db_path, SYNC_URL, stop_event), name="roster", daemon=True).start()
+
+
+def start_background(db_path=DB_PATH):
+    """Run the scanner on a background thread of the calling process (the API's single-process mode).
+
+    Returns a function that stops it and releases the hardware.
+    """
+    doors = open_doors()
+    stop_event = threading.Event()
+    thread = threading.Thread(target=run_doors, args=(doors, db_path),
+                              kwargs={"stop_event": stop_event, "publish_as": None}, name="scanner", daemon=True)
+    thread.start()
+    start_roster_sync(db_path, stop_event)
+    print(f"📲 Attendance scanner started in-process with {len(doors)} reader(s).")
+
+    def stop():
+        stop_event.set()
+        thread.join(timeout=5)
+        close_doors(doors)
+        print("🛑 Attendance scanner stopped.")
+    return stop
+
+
+def main():
+    doors = open_doors()
+    start_roster_sync()
+
+    print(f"\n📲 Attendance Logger Started with {len(doors)} reader(s). Press Ctrl+C to stop.\n")
+    try:
+        run_doors(doors)
+    except KeyboardInterrupt:
+        print("\n🛑 Attendance logging stopped.")
+    finally:
+        close_doors(doors)
+
 
-except KeyboardInterrupt:
-    print("\n🛑 Attendance logging stopped.")
-finally:
-    GPIO.output(BUZZER_PIN, GPIO.LOW)
-    GPIO.cleanup()
+if __name__ == "__main__":
+    main()
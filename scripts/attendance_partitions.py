@@ -0,0 +1,268 @@
+import sqlite3
+import os
+import sys
+from datetime import datetime, timedelta
+from urllib.parse import quote
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BASE_DIR)
+
+from scripts.config import settings
+from scripts.db import connect
+
+DB_PATH = settings["db_path"]
+# Empty means partitions/ next to the database file
+PARTITION_DIR = settings["partition_dir"]
+
+# "month" -> attendance_2025_05.db, "term" -> attendance_2025_T1.db (Jan-Jun) / _T2 (Jul-Dec)
+PARTITION_SCHEME = settings["partition_scheme"]
+
+# The current partition and this many before it stay in the hot attendance table
+HOT_PARTITIONS = settings["hot_partitions"]
+
+ATTENDANCE_COLUMNS = "uid, name, date, time, status"
+
+
+def partition_for(date, scheme=PARTITION_SCHEME):
+    """Return (name, start_date, end_date) of the partition holding a YYYY-MM-DD date."""
+    day = datetime.strptime(date[:10], "%Y-%m-%d")
+    if scheme == "term":
+        first_month = 1 if day.month <= 6 else 7
+        name = f"{day.year}_T{1 if first_month == 1 else 2}"
+        start = day.replace(month=first_month, day=1)
+        months = 6
+    elif scheme == "month":
+        name = f"{day.year}_{day.month:02d}"
+        start = day.replace(day=1)
+        months = 1
+    else:
+        raise ValueError(f"Unknown partition scheme: {scheme}")
+
+    next_month = start.month - 1 + months
+    end = start.replace(year=start.year + next_month // 12, month=next_month % 12 + 1) - timedelta(days=1)
+    return name, start.strftime("%Y-%m-%d"), end.strftime("%Y-%m-%d")
+
+
+def hot_cutoff(today=None, hot_partitions=HOT_PARTITIONS, scheme=PARTITION_SCHEME):
+    """First date that must stay in the hot table; anything older can be sealed."""
+    today = today or datetime.now().strftime("%Y-%m-%d")
+    _, start, _ = partition_for(today, scheme)
+    for _ in range(hot_partitions - 1):
+        previous = datetime.strptime(start, "%Y-%m-%d") - timedelta(days=1)
+        _, start, _ = partition_for(previous.strftime("%Y-%m-%d"), scheme)
+    return start
+
+
+def partitions_in_range(conn, start_date=None, end_date=None):
+    """Sealed partitions overlapping [start_date, end_date], newest first."""
+    cursor = conn.cursor()
+    try:
+        cursor.execute('''
+            SELECT name, path FROM attendance_partitions
+            WHERE end_date >= ? AND start_date <= ?
+            ORDER BY start_date DESC
+        ''', (start_date or "0000-00-00", end_date or "9999-99-99"))
+    except sqlite3.OperationalError:
+        # Database created before partitioning existed; nothing has been rolled over yet
+        return []
+    return cursor.fetchall()
+
+
+def _attached(conn):
+    return {row[1] for row in conn.execute("PRAGMA database_list")}
+
+
+def attendance_source(conn, start_date=None, end_date=None):
+    """Name of a table or view covering attendance between the given dates.
+
+    Only partitions that overlap the range are attached (read-only). When no partition
+    overlaps, the hot table is queried directly. If more partitions overlap than SQLite
+    can attach at once, their rows are copied into a temporary table one file at a time.
+    """
+    parts = partitions_in_range(conn, start_date, end_date)
+    if not parts:
+        return "attendance"
+
+    conn.execute("DROP VIEW IF EXISTS temp.attendance_range")
+    conn.execute("DROP TABLE IF EXISTS temp.attendance_range")
+
+    attached = _attached(conn)
+    limit = conn.getlimit(sqlite3.SQLITE_LIMIT_ATTACHED) if hasattr(conn, "getlimit") else 10
+    free_slots = limit - len(attached - {"main", "temp"})
+
+    if len(parts) <= free_slots:
+        selects = [f"SELECT {ATTENDANCE_COLUMNS} FROM main.attendance"]
+        for name, path in parts:
+            alias = f"part_{name}"
+            if alias not in attached:
+                conn.execute("ATTACH DATABASE ? AS " + alias, (f"file:{quote(path)}?mode=ro",))
+            selects.append(f"SELECT {ATTENDANCE_COLUMNS} FROM {alias}.attendance")
+        conn.execute("CREATE TEMP VIEW attendance_range AS " + " UNION ALL ".join(selects))
+        return "attendance_range"
+
+    conditions = ["date >= ?", "date <= ?"]
+    params = (start_date or "0000-00-00", end_date or "9999-99-99")
+    conn.execute(f'''
+        CREATE TEMP TABLE attendance_range AS
+        SELECT {ATTENDANCE_COLUMNS} FROM main.attendance WHERE {" AND ".join(conditions)}
+    ''', params)
+    for name, path in parts:
+        conn.execute("ATTACH DATABASE ? AS part_scan", (f"file:{quote(path)}?mode=ro",))
+        conn.execute(f'''
+            INSERT INTO temp.attendance_range
+            SELECT {ATTENDANCE_COLUMNS} FROM part_scan.attendance WHERE {" AND ".join(conditions)}
+        ''', params)
+        conn.commit()
+        conn.execute("DETACH DATABASE part_scan")
+    return "attendance_range"
+
+
+def _seal(path):
+    conn = connect(path)
+    conn.execute("VACUUM")
+    conn.close()
+    os.chmod(path, 0o444)
+
+
+def remove_from_partitions(conn, uid_table, archived_at=None):
+    """Delete the attendance of every uid in a temp table from the sealed partitions.
+
+    Each partition holding any of those rows is reopened, edited in its own transaction and
+    sealed again. With archived_at the rows are copied into attendance_archive first.
+    Must be called outside a transaction. Returns the number of rows removed.
+    """
+    cursor = conn.cursor()
+    removed = 0
+    for name, path in partitions_in_range(conn):
+        cursor.execute("ATTACH DATABASE ? AS part_scan", (f"file:{quote(path)}?mode=ro",))
+        try:
+            cursor.execute(f"SELECT 1 FROM part_scan.attendance WHERE uid IN (SELECT uid FROM temp.{uid_table}) LIMIT 1")
+            found = cursor.fetchone()
+        finally:
+            cursor.execute("DETACH DATABASE part_scan")
+        if not found:
+            continue
+
+        os.chmod(path, 0o644)
+        cursor.execute("ATTACH DATABASE ? AS part_edit", (path,))
+        try:
+            cursor.execute("BEGIN IMMEDIATE")
+            if archived_at:
+                # As in roll_over, a crash between the two files' commits can leave rows in both
+                cursor.execute(f'''
+                    INSERT INTO main.attendance_archive ({ATTENDANCE_COLUMNS}, archived_at)
+                    SELECT {ATTENDANCE_COLUMNS}, ? FROM part_edit.attendance p
+                    WHERE uid IN (SELECT uid FROM temp.{uid_table})
+                    AND NOT EXISTS (
+                        SELECT 1 FROM main.attendance_archive r
+                        WHERE r.uid = p.uid AND r.date = p.date AND r.status = p.status AND r.time = p.time
+                    )
+                ''', (archived_at,))
+            cursor.execute(f"DELETE FROM part_edit.attendance WHERE uid IN (SELECT uid FROM temp.{uid_table})")
+            removed += cursor.rowcount
+            cursor.execute('''
+                UPDATE attendance_partitions SET row_count = (SELECT COUNT(*) FROM part_edit.attendance)
+                WHERE name = ?
+            ''', (name,))
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            cursor.execute("DETACH DATABASE part_edit")
+        _seal(path)
+    return removed
+
+
+def default_partition_dir(conn):
+    """The configured partition directory, else partitions/ next to the connection's main database file."""
+    if PARTITION_DIR:
+        return PARTITION_DIR
+    for _, name, path in conn.execute("PRAGMA database_list"):
+        if name == "main" and path:
+            return os.path.join(os.path.dirname(path), "partitions")
+    return os.path.join(os.path.dirname(DB_PATH), "partitions")
+
+
+def roll_over(conn, today=None, hot_partitions=HOT_PARTITIONS, scheme=PARTITION_SCHEME, partition_dir=None):
+    """Move attendance older than the hot window into sealed per-partition database files.
+
+    Partitions that already exist are reopened, topped up with any late rows and sealed again.
+    Returns the list of partition names that received rows.
+    """
+    partition_dir = partition_dir or default_partition_dir(conn)
+    cutoff = hot_cutoff(today, hot_partitions, scheme)
+    cursor = conn.cursor()
+    cursor.execute("SELECT DISTINCT substr(date, 1, 7) FROM attendance WHERE date < ?", (cutoff,))
+    months = [row[0] for row in cursor.fetchall()]
+
+    partitions = {}
+    for month in months:
+        name, start, end = partition_for(f"{month}-01", scheme)
+        partitions[name] = (start, end)
+
+    os.makedirs(partition_dir, exist_ok=True)
+    sealed = []
+    for name, (start, end) in sorted(partitions.items()):
+        path = os.path.join(partition_dir, f"attendance_{name}.db")
+        if os.path.exists(path):
+            os.chmod(path, 0o644)
+
+        cursor.execute("ATTACH DATABASE ? AS part_new", (path,))
+        try:
+            cursor.execute("BEGIN IMMEDIATE")
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS part_new.attendance (
+                    uid TEXT NOT NULL,
+                    name TEXT NOT NULL,
+                    date TEXT NOT NULL,
+                    time TEXT NOT NULL,
+                    status TEXT NOT NULL
+                )
+            ''')
+            cursor.execute("CREATE INDEX IF NOT EXISTS part_new.idx_attendance_uid_date_status ON attendance (uid, date, status)")
+            cursor.execute("CREATE INDEX IF NOT EXISTS part_new.idx_attendance_date_time ON attendance (date, time)")
+            # In WAL mode a commit spanning two database files is atomic per file only, so a crash
+            # can leave rows in both; skip the ones the partition already has
+            cursor.execute(f'''
+                INSERT INTO part_new.attendance ({ATTENDANCE_COLUMNS})
+                SELECT {ATTENDANCE_COLUMNS} FROM main.attendance a WHERE date BETWEEN ? AND ?
+                AND NOT EXISTS (
+                    SELECT 1 FROM part_new.attendance p
+                    WHERE p.uid = a.uid AND p.date = a.date AND p.status = a.status AND p.time = a.time
+                )
+            ''', (start, end))
+            cursor.execute("DELETE FROM main.attendance WHERE date BETWEEN ? AND ?", (start, end))
+            cursor.execute("SELECT COUNT(*) FROM part_new.attendance")
+            row_count = cursor.fetchone()[0]
+            cursor.execute('''
+                INSERT OR REPLACE INTO attendance_partitions (name, path, start_date, end_date, row_count, sealed_at)
+                VALUES (?, ?, ?, ?, ?, ?)
+            ''', (name, path, start, end, row_count, datetime.now().strftime("%Y-%m-%d %H:%M:%S")))
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            cursor.execute("DETACH DATABASE part_new")
+
+        _seal(path)
+        sealed.append(name)
+
+    return sealed
+
+
+if __name__ == "__main__":
+    from scripts.create_db import create_tables
+
+    conn = connect(DB_PATH)
+    try:
+        create_tables(conn)
+        sealed = roll_over(conn)
+    finally:
+        conn.close()
+
+    if sealed:
+        print(f"✅ Sealed {len(sealed)} partition(s): {', '.join(sealed)}")
+    else:
+        print("🟢 Nothing to roll over; all attendance is within the hot window.")
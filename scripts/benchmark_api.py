@@ -0,0 +1,176 @@
+import asyncio
+import json
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BASE_DIR)
+
+from scripts import scanner_event_queue
+from scripts.benchmark_scans import percentiles
+from scripts.synthetic_data import SCALES, generate
+
+# What one open dashboard does (seconds between requests), mirroring js/app.js
+DASHBOARD_MIX = [
+    ("/attendance/today", "include_student=true", 5.0),   # auto refresh
+    ("/stats/distribution", "", 5.0),                       # auto refresh: stat cards and charts
+    ("/students", "fields=uid,name,reg_no,department,year,section", 60.0),  # page reloads / navigation
+    ("/students", "sort=name&limit=100&fields=uid,name,reg_no,department,year,section", 30.0),  # registry page
+    ("/attendance", "", 60.0),
+    ("/students/search", "q=kum&year=2", 10.0),            # registry search box
+]
+# Registration desks poll for the last scanned card every second
+POLL_MIX = [("/latest-uid", "", 1.0)]
+
+
+async def asgi_get(app, path, query=""):
+    """Send one GET straight into the ASGI app; returns (status, body size)."""
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "GET",
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode(),
+        "root_path": "",
+        "query_string": query.encode(),
+        "headers": [(b"host", b"benchmark"), (b"accept-encoding", b"identity")],
+        "client": ("127.0.0.1", 0),
+        "server": ("benchmark", 80),
+    }
+    response = {"status": None, "size": 0}
+    sent = False
+
+    async def receive():
+        nonlocal sent
+        if not sent:
+            sent = True
+            return {"type": "http.request", "body": b"", "more_body": False}
+        await asyncio.Event().wait()
+
+    async def send(message):
+        if message["type"] == "http.response.start":
+            response["status"] = message["status"]
+        elif message["type"] == "http.response.body":
+            response["size"] += len(message.get("body", b""))
+
+    await app(scope, receive, send)
+    return response["status"], response["size"]
+
+
+async def dashboard(app, mix, deadline, speedup, stats, rng):
+    # Every dashboard starts by loading everything once
+    timers = [(rng.uniform(0, interval / speedup), path, query, interval) for path, query, interval in mix]
+    started = time.monotonic()
+    while True:
+        timers.sort()
+        due, path, query, interval = timers[0]
+        wait = started + due - time.monotonic()
+        if started + due >= deadline:
+            return
+        if wait > 0:
+            await asyncio.sleep(wait)
+        t0 = time.perf_counter()
+        try:
+            status, size = await asgi_get(app, path, query)
+        except Exception:
+            status, size = 599, 0
+        elapsed = time.perf_counter() - t0
+        entry = stats.setdefault(path, {"latencies": [], "errors": 0, "bytes": 0})
+        entry["latencies"].append(elapsed)
+        entry["bytes"] += size
+        if status != 200:
+            entry["errors"] += 1
+        timers[0] = (due + interval / speedup, path, query, interval)
+
+
+async def run_load(app, dashboards, pollers, duration, speedup, seed):
+    rng = random.Random(seed)
+    stats = {}
+    deadline = time.monotonic() + duration
+    tasks = [dashboard(app, DASHBOARD_MIX, deadline, speedup, stats, rng) for _ in range(dashboards)]
+    tasks += [dashboard(app, POLL_MIX, deadline, speedup, stats, rng) for _ in range(pollers)]
+    started = time.monotonic()
+    await asyncio.gather(*tasks)
+    return stats, time.monotonic() - started
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Replay the dashboard request mix against api/main.py in-process")
+    parser.add_argument("--db", help="existing database to copy (default: generate one)")
+    parser.add_argument("--scale", choices=sorted(SCALES), default="small")
+    parser.add_argument("--students", type=int, help="override the scale's student count")
+    parser.add_argument("--days", type=int, help="override the scale's days of history")
+    parser.add_argument("--dashboards", type=int, default=50, help="open dashboards")
+    parser.add_argument("--pollers", type=int, default=2, help="registration pages polling /latest-uid")
+    parser.add_argument("--duration", type=float, default=30.0, help="seconds to run")
+    parser.add_argument("--speedup", type=float, default=1.0, help="divide every dashboard interval by this")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--output", default="api_benchmark.json")
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="api_bench_")
+    db_path = os.path.join(workdir, "students.db")
+    students, days = SCALES[args.scale]
+    students = args.students or students
+    days = args.days or days
+    if args.db:
+        shutil.copy(args.db, db_path)
+        print(f"📂 Using a copy of {args.db}")
+    else:
+        print(f"🧪 Generating {students} students with {days} days of history...")
+        generate(db_path, students, days, seed=args.seed)
+
+    import api.main as api
+    api.DB_PATH = db_path
+    api.init_db()
+    # Keep the pollers' /latest-uid reads off the real scanner's file
+    scanner_event_queue.UID_FILE_PATH = os.path.join(workdir, "scanner_uid.txt")
+
+    try:
+        print(f"🚦 {args.dashboards} dashboards + {args.pollers} pollers for {args.duration:.0f}s "
+              f"(speedup x{args.speedup:g})...")
+        stats, elapsed = asyncio.run(run_load(api.app, args.dashboards, args.pollers,
+                                              args.duration, args.speedup, args.seed))
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    endpoints = {}
+    total = 0
+    for path, entry in sorted(stats.items()):
+        count = len(entry["latencies"])
+        total += count
+        endpoints[path] = {
+            "requests": count,
+            "errors": entry["errors"],
+            "throughput": round(count / elapsed, 2),
+            "avg_bytes": entry["bytes"] // count if count else 0,
+            "latency_ms": percentiles(entry["latencies"]),
+        }
+        latency = endpoints[path]["latency_ms"]
+        print(f"   {path:<20} {count:>6} req  {endpoints[path]['throughput']:>7.2f} req/s  "
+              f"p50 {latency['p50']} ms  p95 {latency['p95']} ms  p99 {latency['p99']} ms")
+
+    report = {
+        "benchmark": "api_load",
+        "created_at": datetime.now().isoformat(timespec="seconds"),
+        "config": {**vars(args), "students": students, "days": days},
+        "elapsed_s": round(elapsed, 3),
+        "throughput": round(total / elapsed, 2),
+        "endpoints": endpoints,
+    }
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"\n✅ {total} requests, {report['throughput']} req/s overall. Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,145 @@
+import contextlib
+import io
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BASE_DIR)
+
+from scripts import attendance_logger
+from scripts.hardware import SimulatedReader, SimulatedBuzzer
+from scripts.synthetic_data import generate
+from scripts import metrics, scanner_event_queue
+
+
+def percentiles(values, points=(50, 95, 99)):
+    """Nearest-rank percentiles in milliseconds, plus the maximum."""
+    if not values:
+        return {**{f"p{point}": None for point in points}, "max": None}
+    ordered = sorted(values)
+    result = {}
+    for point in points:
+        index = min(len(ordered) - 1, max(0, int(round(point / 100.0 * len(ordered))) - 1))
+        result[f"p{point}"] = round(ordered[index] * 1000, 2)
+    result["max"] = round(ordered[-1] * 1000, 2)
+    return result
+
+
+class FeedbackBuzzer(SimulatedBuzzer):
+    """Simulated buzzer that notes how long after each tap the first beep started."""
+
+    def __init__(self, reader, realtime=True):
+        super().__init__(realtime=realtime)
+        self.reader = reader
+        self.latencies = []
+        self._last_tap = None
+
+    def on(self):
+        super().on()
+        tap = self.reader.last_tap_time
+        if tap is not None and tap != self._last_tap:
+            self._last_tap = tap
+            self.latencies.append(self._on_since - tap)
+
+
+def run_rate(template_db, uids, rate, duration, cooldown, realtime_buzzer, duplicate_rate, seed, doors=1):
+    workdir = tempfile.mkdtemp(prefix="scan_bench_")
+    db_path = os.path.join(workdir, "students.db")
+    shutil.copy(template_db, db_path)
+
+    # The offered rate is split evenly across doors, each serving its own share of the roster
+    limit = max(1, int(rate * duration / doors))
+    readers = [SimulatedReader(uids=uids[door::doors], rate=rate / doors, distribution="roster",
+                               duplicate_rate=duplicate_rate, unknown_rate=0.0, limit=limit, seed=seed + door)
+               for door in range(doors)]
+    buzzers = [FeedbackBuzzer(reader, realtime=realtime_buzzer) for reader in readers]
+    reader_for = {uid: readers[index % doors] for index, uid in enumerate(uids)}
+    commit_latencies = []
+    outcomes = {}
+
+    def on_scan(uid, outcome):
+        commit_latencies.append(time.monotonic() - reader_for[uid].last_tap_time)
+        outcomes[outcome] = outcomes.get(outcome, 0) + 1
+
+    # Unknown cards are written to the UID file; keep them out of the real scanner's
+    scanner_event_queue.UID_FILE_PATH = os.path.join(workdir, "scanner_uid.txt")
+    metrics.RUN_DIR = workdir
+    started = time.monotonic()
+    with contextlib.redirect_stdout(io.StringIO()):
+        attendance_logger.run_doors([(f"door{index + 1}", reader, buzzer)
+                                     for index, (reader, buzzer) in enumerate(zip(readers, buzzers))],
+                                    db_path=db_path, cooldown=cooldown, on_scan=on_scan)
+    elapsed = time.monotonic() - started
+    shutil.rmtree(workdir, ignore_errors=True)
+
+    processed = len(commit_latencies)
+    taps = sum(reader.taps for reader in readers)
+    dropped = sum(reader.dropped for reader in readers)
+    return {
+        "offered_rate": rate,
+        "doors": doors,
+        "taps": taps,
+        "processed": processed,
+        "dropped": dropped,
+        "drop_ratio": round(dropped / taps, 4) if taps else 0.0,
+        "elapsed_s": round(elapsed, 3),
+        "throughput": round(processed / elapsed, 3) if elapsed else None,
+        "outcomes": outcomes,
+        "scan_to_commit_ms": percentiles(commit_latencies),
+        "feedback_ms": percentiles([latency for buzzer in buzzers for latency in buzzer.latencies]),
+    }
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Measure how many scans per second the logger sustains")
+    parser.add_argument("--students", type=int, default=500)
+    parser.add_argument("--days", type=int, default=180, help="days of attendance history in the synthetic database")
+    parser.add_argument("--rates", default="0.5,1,2,5,10", help="comma-separated tap rates (taps/second)")
+    parser.add_argument("--duration", type=float, default=20.0, help="seconds of taps offered at each rate")
+    parser.add_argument("--cooldown", type=float, default=attendance_logger.SCAN_COOLDOWN,
+                        help="post-scan pause (default: the logger's own setting)")
+    parser.add_argument("--no-buzzer-delay", action="store_true", help="don't sleep for the length of each beep")
+    parser.add_argument("--doors", type=int, default=1, help="readers sharing the offered rate")
+    parser.add_argument("--duplicates", type=float, default=0.05, help="probability of a duplicate tap")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--output", default="scan_benchmark.json")
+    args = parser.parse_args()
+
+    template_dir = tempfile.mkdtemp(prefix="scan_bench_template_")
+    template_db = os.path.join(template_dir, "students.db")
+    print(f"🧪 Generating {args.students} students with {args.days} days of history...")
+    uids = generate(template_db, args.students, args.days, seed=args.seed)
+
+    results = []
+    try:
+        for rate in [float(rate) for rate in args.rates.split(",")]:
+            result = run_rate(template_db, uids, rate, args.duration, args.cooldown,
+                              not args.no_buzzer_delay, args.duplicates, args.seed, args.doors)
+            results.append(result)
+            print(f"⏱️ {rate:>6.1f} taps/s -> {result['throughput']:>6.2f} scans/s, "
+                  f"dropped {result['dropped']}/{result['taps']}, "
+                  f"commit p95 {result['scan_to_commit_ms']['p95']} ms, "
+                  f"feedback p95 {result['feedback_ms']['p95']} ms")
+    finally:
+        shutil.rmtree(template_dir, ignore_errors=True)
+
+    report = {
+        "benchmark": "scan_throughput",
+        "created_at": datetime.now().isoformat(timespec="seconds"),
+        "config": vars(args),
+        "results": results,
+    }
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"\n✅ Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,183 @@
+import http.client
+import json
+import multiprocessing
+import os
+import random
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BASE_DIR)
+
+from scripts.benchmark_scans import percentiles
+from scripts.synthetic_data import SCALES, generate
+from scripts.sync import encode_batch
+
+# (weight, method, path) of the closed-loop request mix; POSTs go through the shared write path
+MIX = [
+    (40, "GET", "/attendance/today?include_student=true"),
+    (20, "GET", "/students"),
+    (15, "GET", "/attendance?start_date={recent}"),
+    (15, "GET", "/latest-uid"),
+    (10, "POST", "/sync/attendance"),
+]
+
+
+def _free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def wait_ready(port, timeout=30.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            conn = http.client.HTTPConnection("127.0.0.1", port, timeout=1)
+            conn.request("GET", "/")
+            if conn.getresponse().status == 200:
+                return True
+        except OSError:
+            time.sleep(0.1)
+    return False
+
+
+def _client(port, threads, duration, uids, seed, results):
+    """One load-generating process: `threads` keep-alive connections in a closed loop."""
+    recent = (datetime.now() - timedelta(days=7)).strftime("%Y-%m-%d")
+    weights = [weight for weight, _, _ in MIX]
+    deadline = time.monotonic() + duration
+    latencies, errors = [], []
+
+    def loop(index):
+        rng = random.Random(seed * 1000 + index)
+        conn = http.client.HTTPConnection("127.0.0.1", port, timeout=30)
+        while time.monotonic() < deadline:
+            _, method, path = rng.choices(MIX, weights)[0]
+            body, headers = None, {}
+            if method == "POST":
+                uid = rng.choice(uids)
+                day = (datetime.now() - timedelta(days=rng.randrange(1, 30))).strftime("%Y-%m-%d")
+                scan_id = f"bench-{seed}-{index}-{rng.getrandbits(64):x}"
+                body = encode_batch("bench", [(0, scan_id, uid, "Bench", day, "09:00:00", "Present")])
+                headers = {"Content-Type": "application/json", "Content-Encoding": "gzip"}
+            started = time.perf_counter()
+            try:
+                conn.request(method, path.format(recent=recent), body=body, headers=headers)
+                response = conn.getresponse()
+                response.read()
+                status = response.status
+            except (OSError, http.client.HTTPException):
+                conn.close()
+                conn = http.client.HTTPConnection("127.0.0.1", port, timeout=30)
+                status = 599
+            latencies.append(time.perf_counter() - started)
+            if status >= 400:
+                errors.append(status)
+
+    workers = [threading.Thread(target=loop, args=(index,)) for index in range(threads)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    results.put((latencies, errors))
+
+
+def run_workers(db_path, workers, clients, threads, duration, uids, seed):
+    workdir = os.path.dirname(db_path)
+    port = _free_port()
+    env = {**os.environ, "RFID_DB_PATH": db_path, "RFID_API_WORKERS": str(workers), "RFID_RUN_DIR": workdir}
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "api.main:app", "--host", "127.0.0.1", "--port", str(port),
+         "--workers", str(workers), "--log-level", "warning", "--no-access-log", "--app-dir", BASE_DIR],
+        cwd=workdir, env=env)
+    try:
+        if not wait_ready(port):
+            raise RuntimeError(f"uvicorn with {workers} worker(s) did not become ready")
+        results = multiprocessing.Queue()
+        processes = [multiprocessing.Process(target=_client, args=(port, threads, duration, uids, seed + i, results))
+                     for i in range(clients)]
+        started = time.monotonic()
+        for process in processes:
+            process.start()
+        collected = [results.get() for _ in processes]
+        for process in processes:
+            process.join()
+        elapsed = time.monotonic() - started
+    finally:
+        server.terminate()
+        server.wait(timeout=30)
+
+    latencies = [latency for batch, _ in collected for latency in batch]
+    errors = [status for _, batch in collected for status in batch]
+    return {
+        "workers": workers,
+        "requests": len(latencies),
+        "errors": len(errors),
+        "error_statuses": sorted(set(errors)),
+        "elapsed_s": round(elapsed, 3),
+        "throughput": round(len(latencies) / elapsed, 2),
+        "latency_ms": percentiles(latencies),
+    }
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(
+        description="Measure API throughput with 1..N uvicorn workers sharing one SQLite database")
+    parser.add_argument("--workers", default="1,2,4", help="comma-separated worker counts to try")
+    parser.add_argument("--scale", choices=sorted(SCALES), default="small")
+    parser.add_argument("--clients", type=int, default=os.cpu_count() or 2, help="load-generating processes")
+    parser.add_argument("--threads", type=int, default=8, help="connections per client process")
+    parser.add_argument("--duration", type=float, default=20.0, help="seconds per worker count")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--output", default="worker_benchmark.json")
+    args = parser.parse_args()
+
+    template_dir = tempfile.mkdtemp(prefix="worker_bench_template_")
+    template_db = os.path.join(template_dir, "students.db")
+    students, days = SCALES[args.scale]
+    print(f"🧪 Generating {students} students with {days} days of history...")
+    uids = generate(template_db, students, days, seed=args.seed)
+
+    results = []
+    try:
+        for workers in [int(count) for count in args.workers.split(",")]:
+            workdir = tempfile.mkdtemp(prefix="worker_bench_")
+            db_path = os.path.join(workdir, "students.db")
+            shutil.copy(template_db, db_path)
+            try:
+                result = run_workers(db_path, workers, args.clients, args.threads, args.duration, uids, args.seed)
+            finally:
+                shutil.rmtree(workdir, ignore_errors=True)
+            results.append(result)
+            print(f"⚙️ {workers} worker(s): {result['throughput']:>8.2f} req/s, "
+                  f"p50 {result['latency_ms']['p50']} ms, p95 {result['latency_ms']['p95']} ms, "
+                  f"errors {result['errors']}")
+    finally:
+        shutil.rmtree(template_dir, ignore_errors=True)
+
+    baseline = results[0]["throughput"] if results and results[0]["throughput"] else None
+    for result in results:
+        result["speedup"] = round(result["throughput"] / baseline, 2) if baseline else None
+    report = {
+        "benchmark": "api_workers",
+        "created_at": datetime.now().isoformat(timespec="seconds"),
+        "cpu_count": os.cpu_count(),
+        "config": vars(args),
+        "results": results,
+    }
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"\n✅ Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
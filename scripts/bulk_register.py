@@ -0,0 +1,42 @@
+import os
+import sys
+
+# Setup paths
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BASE_DIR)
+
+from scripts.config import settings
+from scripts.student_import import parse_students, import_students
+from scripts.db import connect
+
+DB_PATH = settings["db_path"]
+
+CONTENT_TYPES = {
+    ".csv": "text/csv",
+    ".ndjson": "application/x-ndjson",
+    ".jsonl": "application/x-ndjson",
+    ".json": "application/json",
+}
+
+try:
+    path = sys.argv[1] if len(sys.argv) > 1 else input("📂 Enter path to CSV / JSON / NDJSON file: ").strip()
+    content_type = CONTENT_TYPES.get(os.path.splitext(path)[1].lower(), "application/json")
+
+    with open(path, "rb") as f:
+        rows = parse_students(f.read(), content_type)
+    print(f"\n📥 Loaded {len(rows)} student(s) from {path}")
+
+    conn = connect(DB_PATH)
+    inserted, problems = import_students(conn, rows)
+
+    print(f"\n✅ Registered {inserted} student(s).")
+    if problems:
+        print(f"⚠️ Skipped {len(problems)} row(s):")
+        for problem in problems:
+            print(f"   Row {problem['row']} (UID: {problem['uid'] or 'N/A'}): {problem['error']}")
+
+except Exception as e:
+    print(f"❌ Error: {e}")
+finally:
+    if 'conn' in locals():
+        conn.close()
@@ -0,0 +1,170 @@
+import gzip
+import re
+from collections import OrderedDict
+
+import anyio
+from starlette.datastructures import Headers, MutableHeaders
+
+from scripts.config import settings
+from scripts import metrics
+
+try:
+    import brotli  # in requirements.txt; without it every client gets gzip
+except ImportError:
+    brotli = None
+
+COMPRESS = settings["compress"]
+# Smaller bodies gain too little over Wi-Fi to be worth the CPU
+COMPRESS_MIN_BYTES = settings["compress_min_bytes"]
+GZIP_LEVEL = settings["gzip_level"]
+BROTLI_LEVEL = settings["brotli_level"]
+# Compressed copies of responses that carry an ETag, kept so repeat requests aren't compressed again
+COMPRESS_CACHE_BYTES = int(settings["compress_cache_mb"] * 1024 * 1024)
+# Bodies this large are compressed on a worker thread instead of the event loop
+THREAD_MIN_BYTES = 64 * 1024
+
+COMPRESSIBLE_TYPES = ("text/", "application/json", "application/x-ndjson", "application/javascript",
+                      "image/svg+xml")
+
+# The "-gzip" / "-br" that variant_etag() adds to a compressed response's ETag
+_VARIANT_SUFFIX = re.compile(r'-(?:br|gzip)"')
+
+compressed_bytes = metrics.counter("rfid_compressed_bytes_total",
+                                   "Response bytes before (in) and after (out) compression",
+                                   ("encoding", "stage"))
+
+
+def choose_encoding(accept_encoding):
+    """The encoding to use for an Accept-Encoding header: br if offered and available, else gzip, else None."""
+    offered = {}
+    for part in accept_encoding.split(","):
+        name, *params = [piece.strip() for piece in part.split(";")]
+        quality = 1.0
+        for param in params:
+            if param.startswith("q="):
+                try:
+                    quality = float(param[2:])
+                except ValueError:
+                    quality = 0.0
+        if name:
+            offered[name.lower()] = quality
+    best, best_quality = None, 0.0
+    for encoding in ("br", "gzip") if brotli else ("gzip",):
+        quality = offered.get(encoding, offered.get("*", 0.0))
+        if quality > best_quality:
+            best, best_quality = encoding, quality
+    return best
+
+
+def variant_etag(etag, encoding):
+    """The ETag of a compressed copy: '"roster-7"' -> '"roster-7-gzip"', so caches never mix it up with the original."""
+    return etag[:-1] + f'-{encoding}"' if etag.endswith('"') else etag
+
+
+def compress(body, encoding, gzip_level=GZIP_LEVEL, brotli_level=BROTLI_LEVEL):
+    if encoding == "br":
+        return brotli.compress(body, quality=brotli_level)
+    return gzip.compress(body, gzip_level, mtime=0)
+
+
+class CompressionMiddleware:
+    """Compress response bodies of at least minimum_size bytes with brotli or gzip, as the client prefers.
+
+    Responses with an ETag are compressed once per encoding and served from memory after that,
+    under an ETag with the encoding appended. If-None-Match is handed to the app with that suffix
+    removed, so its own 304 check still matches. Streamed responses, and ones that are already
+    encoded or not text, pass through untouched.
+    """
+
+    def __init__(self, app, minimum_size=COMPRESS_MIN_BYTES, gzip_level=GZIP_LEVEL, brotli_level=BROTLI_LEVEL,
+                 cache_bytes=COMPRESS_CACHE_BYTES):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.gzip_level = gzip_level
+        self.brotli_level = brotli_level
+        self.cache_bytes = cache_bytes
+        self.cache = OrderedDict()  # (path, etag, encoding) -> compressed body, least recently used first
+        self.cached_bytes = 0
+
+    async def __call__(self, scope, receive, send):
+        encoding = choose_encoding(Headers(scope=scope).get("accept-encoding", "")) if scope["type"] == "http" else None
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        if_none_match = Headers(scope=scope).get("if-none-match", "")
+        revalidating = bool(_VARIANT_SUFFIX.search(if_none_match))
+        if revalidating:
+            headers = [(name, value) for name, value in scope["headers"] if name != b"if-none-match"]
+            headers.append((b"if-none-match", _VARIANT_SUFFIX.sub('"', if_none_match).encode("latin-1")))
+            scope = {**scope, "headers": headers}
+
+        start = None
+
+        async def send_compressed(message):
+            nonlocal start
+            if message["type"] == "http.response.start":
+                start = message
+                return
+            if start is None:  # already decided to pass this response through
+                await send(message)
+                return
+            headers = MutableHeaders(raw=start["headers"])
+            body = message.get("body", b"")
+            if start["status"] == 304 and revalidating and "etag" in headers:
+                headers["ETag"] = variant_etag(headers["etag"], encoding)
+            if message.get("more_body") or not self._compressible(headers, body):
+                await send(start)
+                start = None
+                await send(message)
+                return
+
+            headers.add_vary_header("Accept-Encoding")
+            etag = headers.get("etag")
+            key = (scope["path"], etag, encoding) if etag and start["status"] == 200 else None
+            compressed = self._cached(key)
+            if compressed is None:
+                compressed = await self._compress(body, encoding)
+                self._store(key, compressed)
+            if len(compressed) < len(body):
+                headers["Content-Encoding"] = encoding
+                headers["Content-Length"] = str(len(compressed))
+                if etag:
+                    headers["ETag"] = variant_etag(etag, encoding)
+                compressed_bytes.inc(len(body), encoding=encoding, stage="in")
+                compressed_bytes.inc(len(compressed), encoding=encoding, stage="out")
+                body = compressed
+            await send(start)
+            start = None
+            await send({"type": "http.response.body", "body": body})
+
+        await self.app(scope, receive, send_compressed)
+
+    def _compressible(self, headers, body):
+        if len(body) < self.minimum_size or "content-encoding" in headers or "content-range" in headers:
+            return False
+        content_type = headers.get("content-type", "")
+        return content_type.startswith(COMPRESSIBLE_TYPES)
+
+    async def _compress(self, body, encoding):
+        if len(body) >= THREAD_MIN_BYTES:
+            return await anyio.to_thread.run_sync(compress, body, encoding, self.gzip_level, self.brotli_level)
+        return compress(body, encoding, self.gzip_level, self.brotli_level)
+
+    def _cached(self, key):
+        if key is None:
+            return None
+        compressed = self.cache.get(key)
+        metrics.cache_requests.inc(cache="compressed_responses", result="miss" if compressed is None else "hit")
+        if compressed is not None:
+            self.cache.move_to_end(key)
+        return compressed
+
+    def _store(self, key, compressed):
+        if key is None or key in self.cache or len(compressed) > self.cache_bytes:
+            return
+        self.cache[key] = compressed
+        self.cached_bytes += len(compressed)
+        while self.cached_bytes > self.cache_bytes:
+            _, evicted = self.cache.popitem(last=False)
+            self.cached_bytes -= len(evicted)
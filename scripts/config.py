@@ -0,0 +1,165 @@
+import json
+import os
+from datetime import time
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# JSON file of settings to override the defaults below; RFID_CONFIG points at another file
+CONFIG_PATH = os.environ.get("RFID_CONFIG", os.path.join(BASE_DIR, "config.json"))
+
+
+def _bool(value):
+    if isinstance(value, bool):
+        return value
+    text = str(value).strip().lower()
+    if text in ("1", "true", "yes", "on"):
+        return True
+    if text in ("0", "false", "no", "off", ""):
+        return False
+    raise ValueError(f"not a boolean: {value!r}")
+
+
+def _path(value):
+    """Relative paths are relative to the project directory, not to wherever a script was started."""
+    return os.path.join(BASE_DIR, os.path.expanduser(str(value))) if value else ""
+
+
+def _clock(value):
+    hour, minute = str(value).split(":")
+    return time(int(hour), int(minute))
+
+
+# name: (type, default). Set a value in config.json as {"name": value}, or override it with the
+# environment variable RFID_<NAME>; the environment wins over the file.
+SETTINGS = {
+    # Files
+    "db_path": (_path, "database/students.db"),
+    "run_dir": (_path, "database/run"),                  # metrics, heartbeats and supervisor state
+    "partition_dir": (_path, ""),                        # empty: partitions/ next to the database
+    "uid_file": (_path, "scanner_uid.txt"),              # last scanned UID, read by /latest-uid
+
+    # API server
+    "api_port": (int, 8000),
+    "api_workers": (int, 1),
+    "api_threads": (int, 40),                            # threadpool size for the (blocking) endpoints
+    "embedded_scanner": (_bool, False),
+    "busy_timeout_ms": (float, 10000),                   # wait for another process's write lock
+    "slow_query_ms": (float, 100),
+    "plan_cache_ttl": (float, 300),                      # seconds a slow query's plan is reused
+    "compress": (_bool, True),                           # gzip/brotli responses for clients that accept it
+    "compress_min_bytes": (int, 1024),
+    "gzip_level": (int, 6),
+    "brotli_level": (int, 5),                            # brotli is used only if the package is installed
+    "compress_cache_mb": (float, 16),                    # compressed copies of ETag'd responses
+    "metrics": (_bool, True),
+    "profile_token": (str, ""),
+    "profile_sample": (float, 0),
+    "profile_interval_ms": (float, 5),
+    "profile_keep": (int, 20),
+
+    # Scanner
+    "backend": (str, "mfrc522"),                         # mfrc522 | simulated
+    "readers": (str, ""),                                # bus:device:pin_rst:buzzer_pin,...
+    "buzzer_pin": (int, 18),
+    "scan_cooldown": (float, 1.5),                       # same card ignored on a reader for this long
+    "poll_min_ms": (float, 20),
+    "poll_max_ms": (float, 250),
+    "absent_cutoff": (_clock, "08:30"),                  # mark_absentees runs after this time
+    "sim_replay": (_path, ""),
+    "sim_rate": (float, 1.0),
+    "sim_distribution": (str, "roster"),                 # roster | uniform | zipf
+    "sim_duplicates": (float, 0.05),
+    "sim_unknown": (float, 0.01),
+    "sim_tap_duration": (float, 0.5),
+
+    # Partitions
+    "partition_scheme": (str, "month"),                  # month | term
+    "hot_partitions": (int, 2),
+
+    # Student photos
+    "photo_dir": (_path, ""),                            # empty: photos/ next to the database
+    "photo_sizes": (str, "64,256"),                      # thumbnail widths/heights, needs Pillow
+    "photo_max_bytes": (int, 5000000),
+
+    # Edge nodes
+    "node_id": (str, ""),
+    "sync_url": (str, ""),
+    "sync_token": (str, ""),
+    "sync_interval": (float, 10),
+    "sync_batch_size": (int, 500),
+    "roster_interval": (float, 60),
+    "sync_received_days": (float, 30),                   # central: how long scan_ids are kept to spot replays
+
+    # Dashboard (written to js/config.js by `python3 scripts/config.py --write-js`)
+    "dashboard_api_url": (str, ""),                      # empty: port api_port on the page's host
+    "dashboard_refresh_ms": (int, 5000),
+    "dashboard_uid_poll_ms": (int, 1000),
+}
+
+DASHBOARD_JS = os.path.join(BASE_DIR, "js", "config.js")
+
+
+def env_name(name):
+    return "RFID_" + name.upper()
+
+
+def load(path=CONFIG_PATH, environ=os.environ):
+    """Defaults, overridden by the config file, overridden by the environment. Returns (values, sources)."""
+    file_values = {}
+    if path and os.path.exists(path):
+        with open(path) as f:
+            file_values = json.load(f)
+        if not isinstance(file_values, dict):
+            raise ValueError(f"{path}: expected a JSON object of settings")
+        unknown = sorted(set(file_values) - set(SETTINGS))
+        if unknown:
+            raise ValueError(f"{path}: unknown setting(s) {', '.join(unknown)}")
+
+    values, sources = {}, {}
+    for name, (kind, default) in SETTINGS.items():
+        if env_name(name) in environ:
+            raw, source = environ[env_name(name)], env_name(name)
+        elif name in file_values:
+            raw, source = file_values[name], path
+        else:
+            raw, source = default, "default"
+        try:
+            values[name] = kind(raw)
+        except (TypeError, ValueError):
+            raise ValueError(f"{source}: invalid value {raw!r} for {name}") from None
+        sources[name] = source
+    return values, sources
+
+
+settings, sources = load()
+
+
+def dashboard_js(values=settings):
+    config = {
+        "apiBaseUrl": values["dashboard_api_url"],
+        "apiPort": values["api_port"],
+        "refreshIntervalMs": values["dashboard_refresh_ms"],
+        "uidPollIntervalMs": values["dashboard_uid_poll_ms"],
+    }
+    return ("// Generated by `python3 scripts/config.py --write-js`; edit config.json instead\n"
+            f"window.RFID_CONFIG = {json.dumps(config, indent=4)};\n")
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Show the effective configuration and where each value came from")
+    parser.add_argument("--example", action="store_true", help="print every setting with its default, as a config.json")
+    parser.add_argument("--write-js", action="store_true", help=f"write the dashboard settings to {DASHBOARD_JS}")
+    args = parser.parse_args()
+
+    if args.example:
+        print(json.dumps({name: default for name, (_, default) in SETTINGS.items()}, indent=2))
+    elif args.write_js:
+        with open(DASHBOARD_JS, "w") as f:
+            f.write(dashboard_js())
+        print(f"✅ Dashboard settings written to {DASHBOARD_JS}")
+    else:
+        print(f"⚙️ Config file: {CONFIG_PATH}{'' if os.path.exists(CONFIG_PATH) else ' (not found, using defaults)'}")
+        for name, value in settings.items():
+            shown = "***" if name.endswith("token") and value else value
+            print(f"  {name:<22} {str(shown):<40} {sources[name]}")
@@ -1,38 +1,183 @@
-import sqlite3
 import os
+import sys
 
-# Ensure the database directory exists
-os.makedirs("../database", exist_ok=True)
-
-# Connect to (or create) the database
-conn = sqlite3.connect("../database/students.db")
-cursor = conn.cursor()
-
-# Create the students table
-cursor.execute('''
-CREATE TABLE IF NOT EXISTS students (
-    uid TEXT PRIMARY KEY,
-    name TEXT NOT NULL,
-    reg_no TEXT NOT NULL,
-    department TEXT NOT NULL,
-    year TEXT NOT NULL,
-    section TEXT NOT NULL,
-    image TEXT DEFAULT 'default.jpg'
-)
-''')
-
-# Create the attendance table
-cursor.execute('''
-CREATE TABLE IF NOT EXISTS attendance (
-    uid TEXT NOT NULL,
-    name TEXT NOT NULL,
-    date TEXT NOT NULL,
-    time TEXT NOT NULL,
-    status TEXT NOT NULL
-)
-''')
-
-conn.commit()
-conn.close()
-
-print("✅ Database and tables created successfully.")
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BASE_DIR)
+
+from scripts.config import settings
+from scripts.db import connect
+from scripts.student_search import create_search_index
+
+DB_PATH = settings["db_path"]
+
+
+def create_tables(conn):
+    """Create every table and index the system uses. Safe to run on an existing database."""
+    cursor = conn.cursor()
+
+    # WAL lets API workers and the dashboard read while the logger or an import is writing.
+    # The setting is stored in the database file, so every later connection inherits it.
+    cursor.execute("PRAGMA journal_mode = WAL")
+
+    # Create the students table
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS students (
+        uid TEXT PRIMARY KEY,
+        name TEXT NOT NULL,
+        reg_no TEXT NOT NULL,
+        department TEXT NOT NULL,
+        year TEXT NOT NULL,
+        section TEXT NOT NULL,
+        image TEXT DEFAULT 'default.jpg'
+    )
+    ''')
+
+    # Create the attendance table
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS attendance (
+        uid TEXT NOT NULL,
+        name TEXT NOT NULL,
+        date TEXT NOT NULL,
+        time TEXT NOT NULL,
+        status TEXT NOT NULL
+    )
+    ''')
+
+    # Per-student lookups (duplicate check, deletes, summaries) and per-day listings.
+    # status is included so per-student summaries never touch the table itself.
+    cursor.execute("DROP INDEX IF EXISTS idx_attendance_uid_date")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_attendance_uid_date_status ON attendance (uid, date, status)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_attendance_date_time ON attendance (date, time)")
+    # Filters and sort keys of GET /students. The year/section/department index also covers
+    # year/department projections (e.g. the distribution chart) without touching the table.
+    cursor.execute("DROP INDEX IF EXISTS idx_students_year_section")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_students_year_section_department ON students (year, section, department)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_students_section ON students (section)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_students_department ON students (department)")
+
+    # Name / reg no search index for /students/search (see student_search.py)
+    create_search_index(cursor)
+
+    # Archived students and their attendance, moved out of the hot tables
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS students_archive (
+        uid TEXT NOT NULL,
+        name TEXT NOT NULL,
+        reg_no TEXT NOT NULL,
+        department TEXT NOT NULL,
+        year TEXT NOT NULL,
+        section TEXT NOT NULL,
+        image TEXT,
+        archived_at TEXT NOT NULL
+    )
+    ''')
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS attendance_archive (
+        uid TEXT NOT NULL,
+        name TEXT NOT NULL,
+        date TEXT NOT NULL,
+        time TEXT NOT NULL,
+        status TEXT NOT NULL,
+        archived_at TEXT NOT NULL
+    )
+    ''')
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_students_archive_uid ON students_archive (uid)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_attendance_archive_uid ON attendance_archive (uid, date)")
+
+    # Catalog of sealed attendance partitions (see attendance_partitions.py)
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS attendance_partitions (
+        name TEXT PRIMARY KEY,
+        path TEXT NOT NULL,
+        start_date TEXT NOT NULL,
+        end_date TEXT NOT NULL,
+        row_count INTEGER NOT NULL,
+        sealed_at TEXT NOT NULL
+    )
+    ''')
+
+    # Edge nodes: scans waiting to be forwarded to the central server (see sync_agent.py)
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS sync_outbox (
+        seq INTEGER PRIMARY KEY AUTOINCREMENT,
+        scan_id TEXT NOT NULL UNIQUE,
+        uid TEXT NOT NULL,
+        name TEXT NOT NULL,
+        date TEXT NOT NULL,
+        time TEXT NOT NULL,
+        status TEXT NOT NULL,
+        sent_at TEXT
+    )
+    ''')
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_sync_outbox_sent_at ON sync_outbox (sent_at)")
+
+    # Edge nodes: scans the central server refused (HTTP 4xx), set aside so later scans still go out
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS sync_rejected (
+        seq INTEGER PRIMARY KEY,
+        scan_id TEXT NOT NULL UNIQUE,
+        uid TEXT NOT NULL,
+        name TEXT NOT NULL,
+        date TEXT NOT NULL,
+        time TEXT NOT NULL,
+        status TEXT NOT NULL,
+        http_status INTEGER NOT NULL,
+        reason TEXT,
+        rejected_at TEXT NOT NULL
+    )
+    ''')
+
+    # Central server: every scan_id already ingested, so a retried batch is applied only once
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS sync_received (
+        scan_id TEXT PRIMARY KEY,
+        node TEXT NOT NULL,
+        received_at TEXT NOT NULL
+    )
+    ''')
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_sync_received_received_at ON sync_received (received_at)")
+
+    # Roster versioning: every change to students bumps the version edge nodes sync from
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS roster_changes (
+        version INTEGER PRIMARY KEY AUTOINCREMENT,
+        uid TEXT NOT NULL,
+        op TEXT NOT NULL,
+        changed_at TEXT NOT NULL
+    )
+    ''')
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_roster_changes_uid ON roster_changes (uid, version)")
+    cursor.execute('''
+    CREATE TRIGGER IF NOT EXISTS trg_students_insert AFTER INSERT ON students BEGIN
+        INSERT INTO roster_changes (uid, op, changed_at) VALUES (NEW.uid, 'upsert', datetime('now', 'localtime'));
+    END
+    ''')
+    cursor.execute('''
+    CREATE TRIGGER IF NOT EXISTS trg_students_update AFTER UPDATE ON students BEGIN
+        INSERT INTO roster_changes (uid, op, changed_at)
+            SELECT OLD.uid, 'delete', datetime('now', 'localtime') WHERE OLD.uid <> NEW.uid;
+        INSERT INTO roster_changes (uid, op, changed_at) VALUES (NEW.uid, 'upsert', datetime('now', 'localtime'));
+    END
+    ''')
+    cursor.execute('''
+    CREATE TRIGGER IF NOT EXISTS trg_students_delete AFTER DELETE ON students BEGIN
+        INSERT INTO roster_changes (uid, op, changed_at) VALUES (OLD.uid, 'delete', datetime('now', 'localtime'));
+    END
+    ''')
+
+    # Small key/value store for sync bookkeeping (e.g. the roster version an edge node holds)
+    cursor.execute("CREATE TABLE IF NOT EXISTS sync_state (key TEXT PRIMARY KEY, value TEXT NOT NULL)")
+
+    conn.commit()
+
+
+if __name__ == "__main__":
+    # Ensure the database directory exists
+    os.makedirs(os.path.dirname(DB_PATH), exist_ok=True)
+
+    # Connect to (or create) the database
+    conn = connect(DB_PATH)
+    create_tables(conn)
+    conn.close()
+
+    print("✅ Database and tables created successfully.")
@@ -0,0 +1,206 @@
+import logging
+import re
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # not on Windows; file_lock() degrades to a no-op there
+    fcntl = None
+
+from scripts import metrics
+from scripts.config import settings
+
+# Statements slower than this (execute + fetch) are logged with their query plan
+SLOW_QUERY_MS = settings["slow_query_ms"]
+# How long a writer waits for another process's write lock before "database is locked"
+BUSY_TIMEOUT = settings["busy_timeout_ms"] / 1000
+# How long a captured plan is reused before EXPLAIN QUERY PLAN is run again
+PLAN_TTL = settings["plan_cache_ttl"]
+
+logger = logging.getLogger("rfid.sql")
+
+query_seconds = metrics.histogram("rfid_sqlite_query_seconds", "Time spent executing SQL statements", ("operation",))
+fetch_rows = metrics.histogram("rfid_sqlite_rows_returned", "Rows returned per fetchall()", ("operation",),
+                               buckets=metrics.ROW_BUCKETS)
+
+_stats = {}
+_stats_lock = threading.Lock()
+
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_NUMBER = re.compile(r"\b\d+(?:\.\d+)?\b")
+_IN_LIST = re.compile(r"\bIN\s*\(\s*\?(?:\s*,\s*\?)+\s*\)", re.IGNORECASE)
+_SPACE = re.compile(r"\s+")
+_EXPLAINABLE = ("SELECT", "INSERT", "UPDATE", "DELETE", "WITH")
+
+
+def normalize(sql):
+    """Collapse whitespace, literals and IN-lists so equivalent statements share one entry."""
+    sql = _STRING.sub("?", sql)
+    sql = _NUMBER.sub("?", sql)
+    sql = _SPACE.sub(" ", sql).strip()
+    return _IN_LIST.sub("IN (?...)", sql)
+
+
+def _operation(sql):
+    word = sql.lstrip().split(None, 1)[0].upper() if sql.strip() else ""
+    return word if word in ("SELECT", "INSERT", "UPDATE", "DELETE", "WITH", "BEGIN", "CREATE") else "OTHER"
+
+
+def _explain(connection, sql, parameters):
+    try:
+        cursor = sqlite3.Cursor(connection)
+        cursor.execute("EXPLAIN QUERY PLAN " + sql, parameters)
+        return [detail for (_, _, _, detail) in cursor.fetchall()]
+    except sqlite3.Error as e:
+        return [f"(plan unavailable: {e})"]
+
+
+def _record(connection, sql, parameters, operation, duration, rows):
+    query_seconds.observe(duration, operation=operation)
+    key = normalize(sql)
+    with _stats_lock:
+        entry = _stats.get(key)
+        if entry is None:
+            entry = _stats[key] = {"statement": key, "count": 0, "total_s": 0.0, "max_s": 0.0,
+                                   "rows": 0, "slow": 0, "plan": None, "plan_at": 0.0}
+        entry["count"] += 1
+        entry["total_s"] += duration
+        entry["max_s"] = max(entry["max_s"], duration)
+        entry["rows"] += rows
+
+    if duration * 1000 < SLOW_QUERY_MS:
+        return
+    with _stats_lock:
+        entry["slow"] += 1
+        plan = entry["plan"] if time.monotonic() - entry["plan_at"] < PLAN_TTL else None
+    if plan is None and operation in _EXPLAINABLE:
+        plan = _explain(connection, sql, parameters)
+        with _stats_lock:
+            entry["plan"], entry["plan_at"] = plan, time.monotonic()
+    logger.warning("Slow query (%.1f ms, %d rows): %s\n  params: %.200r\n  plan: %s",
+                   duration * 1000, rows, key, parameters, "; ".join(plan or ["n/a"]))
+
+
+def query_stats(limit=50):
+    """Per-statement totals, slowest (by total time) first."""
+    with _stats_lock:
+        entries = [dict(entry) for entry in _stats.values()]
+    for entry in entries:
+        entry["avg_ms"] = round(entry["total_s"] / entry["count"] * 1000, 3)
+        entry["max_ms"] = round(entry.pop("max_s") * 1000, 3)
+        entry["total_ms"] = round(entry.pop("total_s") * 1000, 3)
+        entry.pop("plan_at")
+    entries.sort(key=lambda entry: entry["total_ms"], reverse=True)
+    return entries[:limit]
+
+
+def reset_query_stats():
+    with _stats_lock:
+        _stats.clear()
+
+
+class TimedCursor(sqlite3.Cursor):
+    """Cursor that times each statement from execute() through its first fetch."""
+
+    _pending = None
+    _operation = "OTHER"
+
+    def _finish(self, rows=0, extra=0.0):
+        pending, self._pending = self._pending, None
+        if pending is not None:
+            sql, parameters, operation, duration = pending
+            _record(self.connection, sql, parameters, operation, duration + extra, rows)
+
+    def execute(self, sql, parameters=()):
+        if not metrics.ENABLED and SLOW_QUERY_MS <= 0:
+            return super().execute(sql, parameters)
+        self._finish()
+        self._operation = _operation(sql)
+        started = time.perf_counter()
+        result = super().execute(sql, parameters)
+        self._pending = (sql, parameters, self._operation, time.perf_counter() - started)
+        if self.description is None:
+            # No result set to fetch; the statement is already complete
+            self._finish(max(self.rowcount, 0))
+        return result
+
+    def executemany(self, sql, seq_of_parameters):
+        self._finish()
+        self._operation = _operation(sql)
+        started = time.perf_counter()
+        result = super().executemany(sql, seq_of_parameters)
+        # The first row's parameters are enough to EXPLAIN the statement
+        first = seq_of_parameters[0] if isinstance(seq_of_parameters, (list, tuple)) and seq_of_parameters else ()
+        self._pending = (sql, first, self._operation, time.perf_counter() - started)
+        self._finish(max(self.rowcount, 0))
+        return result
+
+    def fetchone(self):
+        if self._pending is None:
+            return super().fetchone()
+        started = time.perf_counter()
+        row = super().fetchone()
+        self._finish(0 if row is None else 1, time.perf_counter() - started)
+        return row
+
+    def fetchall(self):
+        if self._pending is None:
+            return super().fetchall()
+        started = time.perf_counter()
+        rows = super().fetchall()
+        fetch_rows.observe(len(rows), operation=self._operation)
+        self._finish(len(rows), time.perf_counter() - started)
+        return rows
+
+    def close(self):
+        self._finish()
+        super().close()
+
+    def __del__(self):
+        # Cursors that were only iterated never reach fetchone()/fetchall()
+        try:
+            self._finish()
+        except Exception:
+            pass
+
+
+class TimedConnection(sqlite3.Connection):
+    # sqlite3's own Connection.execute() uses a plain C cursor, so these are routed through cursor()
+    def cursor(self, factory=TimedCursor):
+        return super().cursor(factory)
+
+    def execute(self, sql, parameters=()):
+        return self.cursor().execute(sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        return self.cursor().executemany(sql, seq_of_parameters)
+
+    def executescript(self, sql_script):
+        return self.cursor().executescript(sql_script)
+
+
+def connect(path, **kwargs):
+    """sqlite3.connect() whose statements are timed, aggregated and slow-logged.
+
+    Writers from other processes (API workers, the logger, the sync agent) are waited for up
+    to BUSY_TIMEOUT instead of failing straight away.
+    """
+    kwargs.setdefault("timeout", BUSY_TIMEOUT)
+    return sqlite3.connect(path, factory=TimedConnection, **kwargs)
+
+
+@contextmanager
+def file_lock(path):
+    """Exclusive advisory lock across processes, e.g. so only one API worker runs start-up maintenance."""
+    if fcntl is None:
+        yield
+        return
+    with open(path, "a") as f:
+        fcntl.flock(f, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(f, fcntl.LOCK_UN)
@@ -1,16 +1,20 @@
-import sqlite3
-from mfrc522 import SimpleMFRC522
-import RPi.GPIO as GPIO
 import os
+import sys
 
 # Get absolute DB path
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-DB_PATH = os.path.join(BASE_DIR, "database", "students.db")
+sys.path.insert(0, BASE_DIR)
 
-reader = SimpleMFRC522()
+from scripts.config import settings
+from scripts.hardware import get_reader
+from scripts.db import connect
+
+DB_PATH = settings["db_path"]
+
+reader = get_reader()
 
 def delete_student_by_uid(uid):
-    conn = sqlite3.connect(DB_PATH)
+    conn = connect(DB_PATH)
     cursor = conn.cursor()
 
     cursor.execute("""
@@ -50,4 +54,4 @@ try:
 except Exception as e:
     print(f"❌ Error: {e}")
 finally:
-    GPIO.cleanup()
+    reader.close()
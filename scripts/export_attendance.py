@@ -1,19 +1,29 @@
-import sqlite3
+import os
+import sys
 import csv
 from datetime import datetime
 
-DB_PATH = "../database/students.db"
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BASE_DIR)
+
+from scripts.config import settings
+from scripts.attendance_partitions import attendance_source
+from scripts.db import connect
+
+DB_PATH = settings["db_path"]
+
 EXPORT_FILE = f"attendance_export_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv"
 
 def fetch_attendance(date=None, section=None, reg_no=None):
-    conn = sqlite3.connect(DB_PATH)
+    conn = connect(DB_PATH)
     cursor = conn.cursor()
+    source = attendance_source(conn, date, date)
 
-    query = """
+    query = f"""
         SELECT s.name, s.reg_no, s.section, s.department, s.year,
                a.date, a.time, a.status
         FROM students s
-        JOIN attendance a ON s.uid = a.uid
+        JOIN {source} a ON s.uid = a.uid
         WHERE 1=1
     """
     params = []
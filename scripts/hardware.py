@@ -0,0 +1,354 @@
+import os
+import queue
+import random
+import threading
+import time
+from itertools import accumulate
+
+from scripts.config import settings
+from scripts.db import connect
+from scripts import metrics
+
+DB_PATH = settings["db_path"]
+
+# Buzzer on GPIO 18 (Pin 12) unless configured otherwise
+BUZZER_PIN = settings["buzzer_pin"]
+# Reader reset on GPIO 25 (Pin 22), as in the wiring table. Given explicitly because in BCM mode
+# the mfrc522 library would otherwise pick BCM 15 (Pin 10)
+RST_PIN = 25
+
+# "mfrc522" talks to the real reader and GPIO; "simulated" runs anywhere
+BACKEND = settings["backend"]
+
+# Simulated reader settings
+SIM_REPLAY_FILE = settings["sim_replay"] or None
+SIM_RATE = settings["sim_rate"]                # taps per second
+SIM_DISTRIBUTION = settings["sim_distribution"]    # roster | uniform | zipf
+SIM_DUPLICATE_RATE = settings["sim_duplicates"]
+SIM_UNKNOWN_RATE = settings["sim_unknown"]
+SIM_TAP_DURATION = settings["sim_tap_duration"]  # seconds a card stays on the reader
+
+
+class MFRC522Reader:
+    """SimpleMFRC522 on a given SPI bus / chip select, imported only when actually used.
+
+    pin_rst is a BCM pin number (RST_PIN when None); GPIO is put in BCM mode if nothing has set it yet.
+    """
+
+    def __init__(self, bus=0, device=0, pin_rst=None):
+        import RPi.GPIO as GPIO
+        from mfrc522 import MFRC522, SimpleMFRC522
+        GPIO.setwarnings(False)
+        if GPIO.getmode() is None:
+            GPIO.setmode(GPIO.BCM)
+        options = {"bus": bus, "device": device, "pin_rst": RST_PIN if pin_rst is None else pin_rst}
+        # SimpleMFRC522() always opens SPI 0.0, so hand it a reader for the right chip select
+        self._reader = SimpleMFRC522.__new__(SimpleMFRC522)
+        self._reader.READER = MFRC522(**options)
+        self.bus = bus
+        self.device = device
+
+    def read(self):
+        uid, text = self._reader.read()
+        return str(uid), text
+
+    def read_no_block(self):
+        uid, text = self._reader.read_no_block()
+        return (str(uid) if uid else None), text
+
+    def close(self, release=True):
+        """Close SPI; release=False leaves GPIO for release_gpio() once every reader is closed."""
+        self._reader.READER.spi.close()
+        if release:
+            release_gpio()
+
+
+def release_gpio(backend=None):
+    """Reset every GPIO pin this process set up. Call it once, after all buzzers and readers are done."""
+    if (backend or BACKEND) == "simulated":
+        return
+    import RPi.GPIO as GPIO
+    GPIO.cleanup()
+
+
+class GPIOBuzzer:
+    def __init__(self, pin=BUZZER_PIN):
+        import RPi.GPIO as GPIO
+        self.GPIO = GPIO
+        self.pin = pin
+        GPIO.setwarnings(False)
+        # Something that left the pins in BOARD mode; the buzzer pin is numbered BCM
+        if GPIO.getmode() not in (None, GPIO.BCM):
+            GPIO.cleanup()
+        if GPIO.getmode() is None:
+            GPIO.setmode(GPIO.BCM)
+        GPIO.setup(pin, GPIO.OUT)
+
+    def on(self):
+        self.GPIO.output(self.pin, self.GPIO.HIGH)
+
+    def off(self):
+        self.GPIO.output(self.pin, self.GPIO.LOW)
+
+    def beep(self, duration=0.3):
+        self.on()
+        time.sleep(duration)
+        self.off()
+
+    def cleanup(self, release=True):
+        """Turn the buzzer off; release=False leaves GPIO for release_gpio() once every door is done."""
+        self.off()
+        if release:
+            self.GPIO.cleanup()
+
+
+class SimulatedBuzzer:
+    """Keeps the same timing as the real buzzer and records every beep as (start, duration)."""
+
+    def __init__(self, pin=BUZZER_PIN, realtime=True):
+        self.pin = pin
+        self.realtime = realtime
+        self.events = []
+        self._on_since = None
+
+    def on(self):
+        self._on_since = time.monotonic()
+
+    def off(self):
+        if self._on_since is not None:
+            self.events.append((self._on_since, time.monotonic() - self._on_since))
+            self._on_since = None
+
+    def beep(self, duration=0.3):
+        self.on()
+        if self.realtime:
+            time.sleep(duration)
+        self.off()
+
+    def cleanup(self, release=True):
+        self.off()
+
+
+# Named feedback patterns: (seconds on, seconds off) steps played back to back
+PATTERNS = {
+    "ack": [(0.15, 0.0)],
+    "present": [(0.5, 0.0)],
+    "duplicate": [(0.1, 0.08), (0.1, 0.0)],
+    "unknown": [(0.3, 0.0)],
+    "error": [(0.08, 0.06), (0.08, 0.06), (0.08, 0.0)],
+}
+# Gap left between two queued patterns so they don't run into one another
+PATTERN_GAP = 0.05
+# Patterns waiting beyond this are dropped rather than played long after the scan
+PATTERN_BACKLOG = 8
+
+buzzer_delay = metrics.histogram("rfid_buzzer_delay_seconds", "Time a feedback pattern waited before playing",
+                                 ("pattern",))
+buzzer_dropped = metrics.counter("rfid_buzzer_dropped_total", "Feedback patterns dropped because the queue was full",
+                                 ("pattern",))
+
+
+class BuzzerScheduler:
+    """Plays named patterns on a buzzer from its own thread so callers never wait for a beep."""
+
+    def __init__(self, buzzer, name="buzzer"):
+        self.buzzer = buzzer
+        self._queue = queue.Queue(PATTERN_BACKLOG)
+        self._thread = threading.Thread(target=self._run, name=name, daemon=True)
+        self._thread.start()
+
+    def play(self, pattern):
+        try:
+            self._queue.put_nowait((pattern, time.monotonic()))
+        except queue.Full:
+            buzzer_dropped.inc(pattern=pattern)
+
+    def _run(self):
+        while True:
+            pattern, queued_at = self._queue.get()
+            if pattern is None:
+                return
+            buzzer_delay.observe(time.monotonic() - queued_at, pattern=pattern)
+            for on, off in PATTERNS.get(pattern, PATTERNS["error"]):
+                self.buzzer.beep(on)
+                if off:
+                    time.sleep(off)
+            if not self._queue.empty():
+                time.sleep(PATTERN_GAP)
+
+    def close(self):
+        """Finish whatever is queued, then stop the thread (the buzzer itself is left alone)."""
+        self._queue.put((None, None))
+        self._thread.join()
+
+
+def load_roster_uids(db_path=DB_PATH):
+    if not os.path.exists(db_path):
+        return []
+    conn = connect(db_path)
+    uids = [uid for (uid,) in conn.execute("SELECT uid FROM students")]
+    conn.close()
+    return uids
+
+
+def _read_replay(path, rate):
+    """Replay file lines are either "seconds,uid" or just "uid" (spaced at the given rate)."""
+    taps = []
+    with open(path) as f:
+        for line in f:
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            if "," in line:
+                offset, uid = line.split(",", 1)
+                taps.append((float(offset), uid.strip()))
+            else:
+                taps.append((len(taps) / rate, line))
+    taps.sort()
+    return taps
+
+
+class SimulatedReader:
+    """Stands in for SimpleMFRC522 by producing card taps on a schedule.
+
+    Taps come from a replay file or are generated at `rate` per second (Poisson arrivals),
+    choosing cards from `uids` by `distribution`:
+      - "roster": every card once in random order, like a morning rush
+      - "uniform": cards drawn at random with replacement
+      - "zipf": a few cards tapped far more often than the rest
+    A card stays on the reader for `tap_duration` seconds. Taps that are not read within
+    that window are counted in `dropped`, just like a card pulled away from a busy reader.
+    """
+
+    def __init__(self, uids=None, rate=SIM_RATE, distribution=SIM_DISTRIBUTION,
+                 duplicate_rate=SIM_DUPLICATE_RATE, unknown_rate=SIM_UNKNOWN_RATE,
+                 tap_duration=SIM_TAP_DURATION, replay_file=SIM_REPLAY_FILE, limit=None, seed=None):
+        self.uids = list(uids if uids is not None else load_roster_uids())
+        self.rate = rate
+        self.distribution = distribution
+        self.duplicate_rate = duplicate_rate
+        self.unknown_rate = unknown_rate
+        self.tap_duration = tap_duration
+        self.limit = limit
+        self.random = random.Random(seed)
+
+        self.taps = 0
+        self.reads = 0
+        self.dropped = 0
+        self.last_tap_time = None
+        self.finished = False
+
+        self._lock = threading.Lock()
+        self._start = None
+        self._pending = []
+        self._zipf_weights = None
+        self._schedule = self._replay(replay_file) if replay_file else self._generate()
+
+    def _replay(self, path):
+        for offset, uid in _read_replay(path, self.rate):
+            yield offset, uid
+
+    def _pick(self, order):
+        if self.uids and self.random.random() >= self.unknown_rate:
+            if self.distribution == "roster":
+                if not order:
+                    order.extend(self.uids)
+                    self.random.shuffle(order)
+                return order.pop()
+            if self.distribution == "zipf":
+                if self._zipf_weights is None:
+                    self._zipf_weights = list(accumulate(1.0 / (rank + 1) for rank in range(len(self.uids))))
+                return self.random.choices(self.uids, cum_weights=self._zipf_weights)[0]
+            return self.random.choice(self.uids)
+        return str(self.random.randrange(10 ** 11, 10 ** 12))
+
+    def _generate(self):
+        offset = 0.0
+        order = []
+        while True:
+            offset += self.random.expovariate(self.rate)
+            uid = self._pick(order)
+            yield offset, uid
+            if self.random.random() < self.duplicate_rate:
+                yield offset + self.random.uniform(0.2, 1.0), uid
+
+    def _next_tap(self, now):
+        """Oldest tap still on the reader at `now`, or the time the next one arrives."""
+        while True:
+            # Keep every tap that has already arrived queued, plus the next one to come
+            while (len(self._pending) < 2 or self._pending[-1][0] <= now) and not self.finished:
+                if self.limit is not None and self.taps >= self.limit:
+                    self.finished = True
+                    break
+                tap = next(self._schedule, None)
+                if tap is None:
+                    self.finished = True
+                    break
+                self.taps += 1
+                self._pending.append(tap)
+                self._pending.sort()
+            if not self._pending:
+                return None, None
+            offset, uid = self._pending[0]
+            if offset + self.tap_duration < now:
+                self._pending.pop(0)
+                self.dropped += 1
+                continue
+            if offset <= now:
+                self._pending.pop(0)
+                return (offset, uid), None
+            return None, offset
+
+    @property
+    def queue_depth(self):
+        """Taps that have arrived but not been read yet."""
+        if self._start is None:
+            return 0
+        now = time.monotonic() - self._start
+        return sum(1 for offset, _ in self._pending if offset <= now)
+
+    def read_no_block(self):
+        with self._lock:
+            if self._start is None:
+                self._start = time.monotonic()
+            tap, next_at = self._next_tap(time.monotonic() - self._start)
+            if tap is None:
+                if next_at is None:
+                    raise EOFError("Simulated reader has no more taps")
+                return None, None
+            self.reads += 1
+            self.last_tap_time = self._start + tap[0]
+            return tap[1], ""
+
+    def read(self):
+        while True:
+            with self._lock:
+                if self._start is None:
+                    self._start = time.monotonic()
+                now = time.monotonic() - self._start
+                tap, next_at = self._next_tap(now)
+                if tap is not None:
+                    self.reads += 1
+                    self.last_tap_time = self._start + tap[0]
+                    return tap[1], ""
+                if next_at is None:
+                    raise EOFError("Simulated reader has no more taps")
+            time.sleep(max(0.0, next_at - now))
+
+    def close(self, release=True):
+        pass
+
+
+def get_reader(backend=None, bus=0, device=0, pin_rst=None, **options):
+    """options go to SimulatedReader; bus/device/pin_rst pick the physical reader."""
+    backend = backend or BACKEND
+    if backend == "simulated":
+        return SimulatedReader(**options)
+    return MFRC522Reader(bus, device, pin_rst)
+
+
+def get_buzzer(backend=None, pin=BUZZER_PIN):
+    backend = backend or BACKEND
+    if backend == "simulated":
+        return SimulatedBuzzer(pin)
+    return GPIOBuzzer(pin)
@@ -1,23 +1,29 @@
-import sqlite3
-from datetime import datetime, time
+from datetime import datetime
 import os
+import sys
 
 # Get full DB path
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-DB_PATH = os.path.join(BASE_DIR, "database", "students.db")
+sys.path.insert(0, BASE_DIR)
 
-def is_past_830am():
-    now = datetime.now().time()
-    return now >= time(8, 30)
+from scripts.config import settings
+from scripts.db import connect
+
+DB_PATH = settings["db_path"]
+# Students without a scan by this time are marked absent
+ABSENT_CUTOFF = settings["absent_cutoff"]
+
+def is_past_cutoff():
+    return datetime.now().time() >= ABSENT_CUTOFF
 
 def mark_absentees():
-    if not is_past_830am():
-        print("⏳ It's not yet 8:30 AM. Come back later!")
+    if not is_past_cutoff():
+        print(f"⏳ It's not yet {ABSENT_CUTOFF:%H:%M}. Come back later!")
         return
 
     today = datetime.now().strftime("%Y-%m-%d")
 
-    conn = sqlite3.connect(DB_PATH)
+    conn = connect(DB_PATH)
     cursor = conn.cursor()
 
     # Get all registered students
@@ -38,7 +44,7 @@ def mark_absentees():
         cursor.execute('''
             INSERT INTO attendance (uid, name, date, time, status)
             VALUES (?, ?, ?, ?, ?)
-        ''', (uid, name, today, "08:30:00", "Absent"))
+        ''', (uid, name, today, ABSENT_CUTOFF.strftime("%H:%M:%S"), "Absent"))
         marked += 1
 
     conn.commit()
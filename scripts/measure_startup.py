@@ -0,0 +1,124 @@
+import json
+import os
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+from datetime import datetime
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BASE_DIR)
+
+from scripts.config import settings
+
+DB_PATH = settings["db_path"]
+
+
+def import_times(module, top=15):
+    """Run `python -X importtime -c "import <module>"` and return (total seconds, slowest imports)."""
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                            cwd=BASE_DIR, capture_output=True, text=True)
+    entries = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        entries.append((name.rstrip(), int(self_us), int(cumulative_us)))
+    total = sum(self_us for _, self_us, _ in entries) / 1e6
+    # Only modules imported directly by something (depth <= 2) keep the list readable
+    shallow = [entry for entry in entries if len(entry[0]) - len(entry[0].lstrip()) <= 4]
+    shallow.sort(key=lambda entry: entry[2], reverse=True)
+    return total, [{"module": name.strip(), "cumulative_ms": round(cumulative / 1000, 1)}
+                   for name, _, cumulative in shallow[:top]]
+
+
+def _free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _http_ok(url):
+    try:
+        with urllib.request.urlopen(url, timeout=1) as response:
+            return response.status == 200
+    except OSError:
+        return False
+
+
+def cold_start(args, db_path, run_dir, timeout=60.0):
+    """Start run.py in the given mode and time until scans are accepted and the API answers."""
+    port = _free_port()
+    env = {**os.environ, "RFID_DB_PATH": db_path, "RFID_RUN_DIR": run_dir, "RFID_API_PORT": str(port),
+           "RFID_BACKEND": "simulated", "RFID_SIM_RATE": "0.001"}
+    heartbeat = os.path.join(run_dir, "heartbeat_logger")
+    started = time.monotonic()
+    process = subprocess.Popen([sys.executable, "run.py", *args], cwd=BASE_DIR, env=env,
+                               stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    scanning = api = None
+    try:
+        while time.monotonic() - started < timeout and (scanning is None or api is None):
+            if process.poll() is not None:
+                raise RuntimeError(f"run.py {' '.join(args)} exited with code {process.returncode}")
+            if scanning is None and os.path.exists(heartbeat):
+                scanning = time.monotonic() - started
+            if api is None and _http_ok(f"http://127.0.0.1:{port}/"):
+                api = time.monotonic() - started
+            time.sleep(0.02)
+    finally:
+        process.terminate()
+        try:
+            process.wait(timeout=15)
+        except subprocess.TimeoutExpired:
+            process.kill()
+    return {"accepting_scans_s": round(scanning, 3) if scanning else None,
+            "api_ready_s": round(api, 3) if api else None}
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Measure import times and time-to-first-scan for each launch mode")
+    parser.add_argument("--db", default=DB_PATH, help="database to copy for the cold-start runs")
+    parser.add_argument("--runs", type=int, default=3, help="cold starts per mode")
+    parser.add_argument("--target", type=float, default=3.0, help="seconds after launch scans must be accepted by")
+    parser.add_argument("--output", default="startup_benchmark.json")
+    args = parser.parse_args()
+
+    report = {"benchmark": "startup", "created_at": datetime.now().isoformat(timespec="seconds"),
+              "config": vars(args), "imports": {}, "modes": {}}
+    for module in ("api.main", "scripts.attendance_logger"):
+        total, slowest = import_times(module)
+        report["imports"][module] = {"total_s": round(total, 3), "slowest": slowest}
+        heaviest = ", ".join(f"{entry['module']} {entry['cumulative_ms']}ms" for entry in slowest[:4])
+        print(f"📦 import {module}: {total:.3f}s ({heaviest})")
+
+    modes = {"single": ["--single"], "supervised": ["--no-prompt"]}
+    for mode, mode_args in modes.items():
+        runs = []
+        for _ in range(args.runs):
+            workdir = tempfile.mkdtemp(prefix="startup_bench_")
+            try:
+                db_path = os.path.join(workdir, "students.db")
+                shutil.copy(args.db, db_path)
+                runs.append(cold_start(mode_args, db_path, os.path.join(workdir, "run")))
+            finally:
+                shutil.rmtree(workdir, ignore_errors=True)
+        best = min((run["accepting_scans_s"] for run in runs if run["accepting_scans_s"]), default=None)
+        best_api = min((run["api_ready_s"] for run in runs if run["api_ready_s"]), default=None)
+        meets = best is not None and best <= args.target
+        report["modes"][mode] = {"runs": runs, "best_accepting_scans_s": best, "best_api_ready_s": best_api,
+                                 "meets_target": meets}
+        print(f"⏱️ {mode:<10} accepting scans after {best}s, API after {best_api}s "
+              f"({'✅ within' if meets else '❌ over'} {args.target:g}s target)")
+
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"\n✅ Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
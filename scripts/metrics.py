@@ -0,0 +1,195 @@
+import glob
+import json
+import os
+import threading
+import time
+
+from scripts.config import settings
+
+# RFID_METRICS=0 turns every recording call into an early return
+ENABLED = settings["metrics"]
+
+# Processes other than the API (the logger) publish their metrics here for /metrics to merge
+RUN_DIR = settings["run_dir"]
+
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+ROW_BUCKETS = (0, 1, 10, 100, 1000, 10000, 100000)
+
+_registry = {}
+_registry_lock = threading.Lock()
+
+
+class _Metric:
+    type = None
+
+    def __init__(self, name, help, labelnames=()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def _key(self, labels):
+        return tuple(str(labels.get(label, "")) for label in self.labelnames)
+
+    def state(self):
+        with self._lock:
+            values = [[list(key), value] for key, value in self._values.items()]
+        return {"type": self.type, "help": self.help, "labels": list(self.labelnames), "values": values}
+
+
+class Counter(_Metric):
+    type = "counter"
+
+    def inc(self, amount=1, **labels):
+        if not ENABLED:
+            return
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+
+class Gauge(_Metric):
+    type = "gauge"
+
+    def set(self, value, **labels):
+        if not ENABLED:
+            return
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+
+class Histogram(_Metric):
+    type = "histogram"
+
+    def __init__(self, name, help, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, help, labelnames)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value, **labels):
+        if not ENABLED:
+            return
+        key = self._key(labels)
+        with self._lock:
+            entry = self._values.get(key)
+            if entry is None:
+                entry = self._values[key] = [[0] * len(self.buckets), 0.0, 0]
+            for index, bound in enumerate(self.buckets):
+                if value <= bound:
+                    entry[0][index] += 1
+                    break
+            entry[1] += value
+            entry[2] += 1
+
+    def state(self):
+        state = super().state()
+        state["buckets"] = list(self.buckets)
+        return state
+
+
+def _register(cls, name, help, labelnames=(), **kwargs):
+    with _registry_lock:
+        metric = _registry.get(name)
+        if metric is None:
+            metric = _registry[name] = cls(name, help, labelnames, **kwargs)
+        return metric
+
+
+def counter(name, help, labelnames=()):
+    return _register(Counter, name, help, labelnames)
+
+
+def gauge(name, help, labelnames=()):
+    return _register(Gauge, name, help, labelnames)
+
+
+def histogram(name, help, labelnames=(), buckets=DEFAULT_BUCKETS):
+    return _register(Histogram, name, help, labelnames, buckets=buckets)
+
+
+# Shared by every cache in the project
+cache_requests = counter("rfid_cache_requests_total", "Cache lookups by cache and result (hit/miss)", ("cache", "result"))
+
+
+def export_state():
+    with _registry_lock:
+        metrics = list(_registry.values())
+    return {metric.name: metric.state() for metric in metrics}
+
+
+def write_state(process):
+    """Publish this process's metrics for the API's /metrics endpoint to pick up."""
+    if not ENABLED:
+        return
+    os.makedirs(RUN_DIR, exist_ok=True)
+    path = os.path.join(RUN_DIR, f"metrics_{process}.json")
+    with open(path + ".tmp", "w") as f:
+        json.dump({"process": process, "written_at": time.time(), "metrics": export_state()}, f)
+    os.replace(path + ".tmp", path)
+
+
+def read_states(exclude=(), max_age=None):
+    """States published by other processes; with max_age, ones not refreshed for that many seconds are skipped."""
+    states = []
+    for path in sorted(glob.glob(os.path.join(RUN_DIR, "metrics_*.json"))):
+        try:
+            with open(path) as f:
+                state = json.load(f)
+        except (OSError, ValueError):
+            continue
+        if max_age is not None and time.time() - state.get("written_at", 0) > max_age:
+            continue  # e.g. a worker that has since exited
+        if state.get("process") not in exclude:
+            states.append((state["process"], state["metrics"]))
+    return states
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names, values, extra=()):
+    pairs = [f'{name}="{_escape(value)}"' for name, value in list(zip(names, values)) + list(extra)]
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format(value):
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return repr(value) if isinstance(value, float) else str(value)
+
+
+def render(process, others=()):
+    """Prometheus text exposition of this process's metrics merged with other processes' states.
+
+    Every sample gets a process="..." label so the same family can come from several processes.
+    """
+    families = {}
+    for source, state in [(process, export_state())] + list(others):
+        for name, family in state.items():
+            families.setdefault(name, []).append((source, family))
+
+    lines = []
+    for name in sorted(families):
+        first = families[name][0][1]
+        lines.append(f"# HELP {name} {first['help']}")
+        lines.append(f"# TYPE {name} {first['type']}")
+        for source, family in families[name]:
+            labelnames = family["labels"]
+            extra = [("process", source)]
+            for labelvalues, value in family["values"]:
+                if family["type"] != "histogram":
+                    lines.append(f"{name}{_labels(labelnames, labelvalues, extra)} {_format(value)}")
+                    continue
+                bucket_counts, total, count = value
+                cumulative = 0
+                for bound, bucket_count in zip(family["buckets"], bucket_counts):
+                    cumulative += bucket_count
+                    le = extra + [("le", _format(float(bound)))]
+                    lines.append(f"{name}_bucket{_labels(labelnames, labelvalues, le)} {cumulative}")
+                inf = extra + [("le", "+Inf")]
+                lines.append(f"{name}_bucket{_labels(labelnames, labelvalues, inf)} {count}")
+                lines.append(f"{name}_sum{_labels(labelnames, labelvalues, extra)} {_format(total)}")
+                lines.append(f"{name}_count{_labels(labelnames, labelvalues, extra)} {count}")
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,150 @@
+import itertools
+import os
+import random
+import sys
+import threading
+import time
+from collections import Counter, deque
+
+from scripts.config import settings
+
+# Requests carrying "X-Profile: <token>" are profiled; unset disables the header trigger
+PROFILE_TOKEN = settings["profile_token"]
+# Fraction of ordinary requests profiled at random (0.01 = one in a hundred)
+PROFILE_SAMPLE_RATE = settings["profile_sample"]
+PROFILE_INTERVAL = settings["profile_interval_ms"] / 1000
+PROFILE_KEEP = settings["profile_keep"]
+MAX_DEPTH = 64
+
+# Leaf frames of threads that are parked rather than working
+_IDLE = {("threading.py", "wait"), ("selectors.py", "select"), ("queue.py", "get"), ("base_events.py", "_run_once")}
+
+_profiles = deque(maxlen=PROFILE_KEEP)
+_profiles_lock = threading.Lock()
+_ids = itertools.count(1)
+# One profile at a time keeps the overhead bounded; overlapping requests simply go unprofiled
+_active = threading.Lock()
+
+
+def _label(code):
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})".replace(";", ",")
+
+
+def _stack(frame):
+    stack = []
+    while frame is not None and len(stack) < MAX_DEPTH:
+        stack.append(_label(frame.f_code))
+        frame = frame.f_back
+    stack.reverse()
+    return stack
+
+
+class SamplingProfiler:
+    """Samples every thread's Python stack at a fixed interval until stopped.
+
+    A sampler (rather than cProfile) sees the threadpool workers that run sync endpoints as well
+    as the event loop, and costs the same whatever the request does.
+    """
+
+    def __init__(self, interval=PROFILE_INTERVAL):
+        self.interval = interval
+        self.samples = Counter()
+        self.ticks = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="profiler", daemon=True)
+
+    def _run(self):
+        own = threading.get_ident()
+        while not self._stop.is_set():
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident == own:
+                    continue
+                code = frame.f_code
+                if (os.path.basename(code.co_filename), code.co_name) in _IDLE:
+                    continue
+                self.samples[tuple([names.get(ident, str(ident))] + _stack(frame))] += 1
+            self.ticks += 1
+            self._stop.wait(self.interval)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+        return self
+
+
+def should_profile(headers):
+    """Return the reason a request should be profiled ("header" / "sampled"), or None."""
+    if PROFILE_TOKEN and headers.get("x-profile") == PROFILE_TOKEN:
+        return "header"
+    if PROFILE_SAMPLE_RATE > 0 and random.random() < PROFILE_SAMPLE_RATE:
+        return "sampled"
+    return None
+
+
+def begin():
+    """Start a profiler, or return None if another request is already being profiled."""
+    if not _active.acquire(blocking=False):
+        return None
+    return SamplingProfiler().start()
+
+
+def finish(profiler, **info):
+    """Stop the profiler, keep its result in the retention ring and return the new profile id."""
+    try:
+        profiler.stop()
+    finally:
+        _active.release()
+    profile = {
+        "id": next(_ids),
+        "created_at": time.strftime("%Y-%m-%d %H:%M:%S"),
+        "interval_ms": profiler.interval * 1000,
+        "ticks": profiler.ticks,
+        "samples": sum(profiler.samples.values()),
+        **info,
+        "stacks": profiler.samples,
+    }
+    with _profiles_lock:
+        _profiles.append(profile)
+    return profile["id"]
+
+
+def list_profiles():
+    with _profiles_lock:
+        return [{key: value for key, value in profile.items() if key != "stacks"} for profile in reversed(_profiles)]
+
+
+def get_profile(profile_id):
+    with _profiles_lock:
+        for profile in _profiles:
+            if profile["id"] == profile_id:
+                return profile
+    return None
+
+
+def folded(profile):
+    """Collapsed-stack text ("a;b;c count" per line) for flamegraph.pl, speedscope, etc."""
+    return "".join(f"{';'.join(stack)} {count}\n" for stack, count in profile["stacks"].most_common())
+
+
+def summary(profile, limit=25):
+    """Top functions by self (leaf) samples and by inclusive samples."""
+    own, inclusive = Counter(), Counter()
+    for stack, count in profile["stacks"].items():
+        frames = stack[1:]  # drop the thread name
+        if not frames:
+            continue
+        own[frames[-1]] += count
+        for frame in set(frames):
+            inclusive[frame] += count
+    total = sum(profile["stacks"].values()) or 1
+    return {
+        **{key: value for key, value in profile.items() if key != "stacks"},
+        "self": [{"function": f, "samples": n, "percent": round(100 * n / total, 1)} for f, n in own.most_common(limit)],
+        "inclusive": [{"function": f, "samples": n, "percent": round(100 * n / total, 1)}
+                      for f, n in inclusive.most_common(limit)],
+    }
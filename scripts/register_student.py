@@ -1,28 +1,23 @@
-import sqlite3
-from mfrc522 import SimpleMFRC522
-import RPi.GPIO as GPIO
 import os
-import time
+import sys
 
 # Setup paths
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-DB_PATH = os.path.join(BASE_DIR, "database", "students.db")
+sys.path.insert(0, BASE_DIR)
 
-# RFID Reader
-reader = SimpleMFRC522()
+from scripts.config import settings
+from scripts.hardware import get_reader, get_buzzer
+from scripts.db import connect
 
-# Buzzer on GPIO 18
-BUZZER_PIN = 18
-GPIO.setwarnings(False)
-GPIO.cleanup()  # ✅ Reset GPIO on startup
-GPIO.setmode(GPIO.BCM)
-GPIO.setup(BUZZER_PIN, GPIO.OUT)
+DB_PATH = settings["db_path"]
+
+# RFID Reader and buzzer (real hardware unless RFID_BACKEND=simulated)
+reader = get_reader()
+buzzer = get_buzzer()
 
 def beep(duration=0.4):
     print(f"[BEEP] for {duration}s")
-    GPIO.output(BUZZER_PIN, GPIO.HIGH)
-    time.sleep(duration)
-    GPIO.output(BUZZER_PIN, GPIO.LOW)
+    buzzer.beep(duration)
 
 try:
     print("\n📢 Scan the student's RFID card...")
@@ -37,7 +32,7 @@ try:
     year = input("📘 Enter year (e.g., 2nd): ")
     section = input("🏫 Enter section (e.g., CSE-A): ")
 
-    conn = sqlite3.connect(DB_PATH)
+    conn = connect(DB_PATH)
     cursor = conn.cursor()
 
     cursor.execute("SELECT * FROM students WHERE uid = ?", (uid,))
@@ -55,7 +50,7 @@ try:
 except Exception as e:
     print(f"❌ Error: {e}")
 finally:
-    GPIO.output(BUZZER_PIN, GPIO.LOW)
-    GPIO.cleanup()
+    buzzer.cleanup()
+    reader.close()
     if 'conn' in locals():
         conn.close()
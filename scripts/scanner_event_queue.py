@@ -1,6 +1,8 @@
 import os
 
-UID_FILE_PATH = "scanner_uid.txt"
+from scripts.config import settings
+
+UID_FILE_PATH = settings["uid_file"]
 
 def set_latest_uid(uid: str):
     with open(UID_FILE_PATH, "w") as f:
@@ -0,0 +1,83 @@
+from scripts.attendance_partitions import attendance_source
+
+# Columns the dashboard charts break students down by
+GROUP_COLUMNS = ("year", "department", "section")
+UNKNOWN = "Unknown"
+
+
+def _label(value):
+    return UNKNOWN if value in (None, "") else str(value)
+
+
+def roster_distribution(conn):
+    """Students per year, department and section, from one GROUP BY over the covering index."""
+    rows = conn.execute(
+        "SELECT year, department, section, COUNT(*) FROM students GROUP BY year, section, department"
+    ).fetchall()
+    result = {"total_students": sum(row[3] for row in rows)}
+    for i, column in enumerate(GROUP_COLUMNS):
+        counts = {}
+        for row in rows:
+            counts[_label(row[i])] = counts.get(_label(row[i]), 0) + row[3]
+        result[f"by_{column}"] = dict(sorted(counts.items()))
+    return result
+
+
+def attendance_groups(conn, date, groups=None, mark=None):
+    """Attendance for the date counted per (year, department, section, status). Returns (groups, mark).
+
+    Attendance rows are only ever appended to the hot table (one per student per day), so
+    passing back the groups and mark of an earlier call adds just the rows recorded since.
+    The hot table has no AUTOINCREMENT, so after its highest rows are deleted new rows can
+    reuse rowids below the mark. The mark therefore also holds the date's row count, and
+    the date is counted afresh when the rows past the mark don't account for every new one.
+    For a date in a partition, the mark is the count and max rowid of the date's rows still
+    in the hot table. Sync ingest can add late rows there, and those mean a recount.
+    """
+    source = attendance_source(conn, date, date)
+    where, params = "a.date = ?", [date]
+    if source == "attendance":
+        last_rowid = conn.execute("SELECT MAX(rowid) FROM attendance").fetchone()[0] or 0
+        date_count = conn.execute("SELECT COUNT(*) FROM attendance WHERE date = ?", (date,)).fetchone()[0]
+        last = ("hot", last_rowid, date_count)
+        if groups is not None and mark == last:
+            return groups, last
+        since = 0
+        if groups is not None and mark and mark[0] == "hot":
+            added = conn.execute("SELECT COUNT(*) FROM attendance WHERE date = ? AND rowid > ? AND rowid <= ?",
+                                 (date, mark[1], last_rowid)).fetchone()[0]
+            if mark[2] + added == date_count:
+                since = mark[1]
+        groups = dict(groups) if since else {}
+        where += " AND a.rowid > ? AND a.rowid <= ?"
+        params += [since, last_rowid]
+    else:
+        date_rows = conn.execute("SELECT COUNT(*), MAX(rowid) FROM main.attendance WHERE date = ?", (date,)).fetchone()
+        last = ("partition", *date_rows)
+        if groups is not None and mark == last:
+            return groups, last
+        groups = {}
+    rows = conn.execute(f'''
+        SELECT s.year, s.department, s.section, a.status, COUNT(*)
+        FROM {source} a
+        JOIN students s ON s.uid = a.uid
+        WHERE {where}
+        GROUP BY s.year, s.department, s.section, a.status
+    ''', params).fetchall()
+    for *key, count in rows:
+        groups[tuple(key)] = groups.get(tuple(key), 0) + count
+    return groups, last
+
+
+def attendance_distribution(date, groups):
+    """Students per status on the date, overall and per year, department and section."""
+    result = {"date": date, "by_status": {}}
+    for (*_, status), count in groups.items():
+        result["by_status"][status] = result["by_status"].get(status, 0) + count
+    for i, column in enumerate(GROUP_COLUMNS):
+        counts = {}
+        for key, count in groups.items():
+            statuses = counts.setdefault(_label(key[i]), {})
+            statuses[key[3]] = statuses.get(key[3], 0) + count
+        result[f"by_{column}"] = dict(sorted(counts.items()))
+    return result
@@ -0,0 +1,91 @@
+import csv
+import io
+import json
+
+STUDENT_FIELDS = ("uid", "name", "reg_no", "department", "year", "section")
+
+# SQLite caps the number of bound parameters per statement (999 on older builds)
+LOOKUP_CHUNK = 500
+
+
+def parse_students(payload, content_type=""):
+    """Parse a JSON array, NDJSON or CSV upload into a list of dicts."""
+    text = payload.decode("utf-8-sig") if isinstance(payload, bytes) else payload
+    content_type = (content_type or "").lower()
+
+    if "csv" in content_type:
+        return list(csv.DictReader(io.StringIO(text)))
+    if "ndjson" in content_type or "jsonl" in content_type:
+        return [json.loads(line) for line in text.splitlines() if line.strip()]
+
+    data = json.loads(text)
+    if not isinstance(data, list):
+        raise ValueError("Expected a JSON array of students")
+    return data
+
+
+def validate_students(rows):
+    """Split rows into insertable tuples and per-row problems in a single pass."""
+    valid = []
+    problems = []
+    seen = set()
+
+    for index, row in enumerate(rows, start=1):
+        if not isinstance(row, dict):
+            problems.append({"row": index, "uid": None, "error": "Row is not an object"})
+            continue
+        values = tuple(str(row.get(field) or "").strip() for field in STUDENT_FIELDS)
+        missing = [field for field, value in zip(STUDENT_FIELDS, values) if not value]
+        uid = values[0] or None
+        if missing:
+            problems.append({"row": index, "uid": uid, "error": f"Missing fields: {', '.join(missing)}"})
+        elif uid in seen:
+            problems.append({"row": index, "uid": uid, "error": "Duplicate UID in upload"})
+        else:
+            seen.add(uid)
+            valid.append((index, values))
+
+    return valid, problems
+
+
+def find_existing_uids(cursor, uids):
+    existing = set()
+    uids = list(uids)
+    for start in range(0, len(uids), LOOKUP_CHUNK):
+        chunk = uids[start:start + LOOKUP_CHUNK]
+        placeholders = ",".join("?" * len(chunk))
+        cursor.execute(f"SELECT uid FROM students WHERE uid IN ({placeholders})", chunk)
+        existing.update(uid for (uid,) in cursor.fetchall())
+    return existing
+
+
+def import_students(conn, rows):
+    """Insert validated rows with one executemany inside a single transaction.
+
+    Returns (inserted_count, problems) where problems lists every rejected row.
+    """
+    valid, problems = validate_students(rows)
+    cursor = conn.cursor()
+
+    # Take the write lock up front so the existence check and insert see the same table
+    cursor.execute("BEGIN IMMEDIATE")
+    try:
+        existing = find_existing_uids(cursor, (values[0] for _, values in valid))
+        to_insert = []
+        for index, values in valid:
+            if values[0] in existing:
+                problems.append({"row": index, "uid": values[0], "error": "UID already registered"})
+            else:
+                to_insert.append(values)
+
+        cursor.executemany('''
+            INSERT INTO students (uid, name, reg_no, department, year, section)
+            VALUES (?, ?, ?, ?, ?, ?)
+        ''', to_insert)
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+
+    problems.sort(key=lambda problem: problem["row"])
+    return len(to_insert), problems
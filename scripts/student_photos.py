@@ -0,0 +1,116 @@
+import hashlib
+import io
+import os
+import re
+
+from scripts.config import settings
+
+DB_PATH = settings["db_path"]
+# Photos are stored under their SHA-256, so a file never changes once written and can be cached forever
+PHOTO_DIR = settings["photo_dir"] or os.path.join(os.path.dirname(DB_PATH), "photos")
+THUMBNAIL_SIZES = tuple(int(size) for size in settings["photo_sizes"].split(",") if size.strip())
+MAX_PHOTO_BYTES = settings["photo_max_bytes"]
+# What students.image holds for a student without a photo
+NO_PHOTO = "default.jpg"
+
+# Leading bytes of each accepted format
+FORMATS = {
+    b"\xff\xd8\xff": "jpg",
+    b"\x89PNG\r\n\x1a\n": "png",
+    b"GIF87a": "gif",
+    b"GIF89a": "gif",
+}
+MEDIA_TYPES = {"jpg": "image/jpeg", "png": "image/png", "gif": "image/gif", "webp": "image/webp"}
+PHOTO_NAME = re.compile(r"^([0-9a-f]{64})(?:_(\d+))?\.(jpg|png|gif|webp)$")
+
+
+def photo_format(data):
+    """The file extension for an accepted image, from its content rather than what the client claims."""
+    if data[:4] == b"RIFF" and data[8:12] == b"WEBP":
+        return "webp"
+    return next((ext for magic, ext in FORMATS.items() if data.startswith(magic)), None)
+
+
+def photo_path(name, photo_dir=None):
+    """Files fan out into 256 subdirectories by the first two hex digits of their hash."""
+    return os.path.join(photo_dir or PHOTO_DIR, name[:2], name)
+
+
+def _write(path, data):
+    # Write-then-rename, so a reader never sees half a file
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(data)
+    os.replace(tmp, path)
+
+
+def _thumbnail(data, size):
+    from PIL import Image  # optional; without Pillow the original is served at every size
+
+    with Image.open(io.BytesIO(data)) as image:
+        image.thumbnail((size, size))
+        if image.mode not in ("RGB", "L"):
+            image = image.convert("RGB")
+        out = io.BytesIO()
+        image.save(out, "JPEG", quality=85, optimize=True, progressive=True)
+    return out.getvalue()
+
+
+def save_photo(data, photo_dir=None):
+    """Store an uploaded photo and its thumbnails; returns the name to keep in students.image.
+
+    Raises ValueError for an empty, oversized or unrecognised image.
+    """
+    if not data:
+        raise ValueError("Empty photo")
+    if len(data) > MAX_PHOTO_BYTES:
+        raise ValueError(f"Photo is larger than {MAX_PHOTO_BYTES} bytes")
+    ext = photo_format(data)
+    if ext is None:
+        raise ValueError("Photo must be a JPEG, PNG, GIF or WebP image")
+    digest = hashlib.sha256(data).hexdigest()
+    name = f"{digest}.{ext}"
+    path = photo_path(name, photo_dir)
+    if not os.path.exists(path):  # the same picture uploaded twice is stored once
+        _write(path, data)
+
+    for size in THUMBNAIL_SIZES:
+        thumb_path = photo_path(f"{digest}_{size}.jpg", photo_dir)
+        if os.path.exists(thumb_path):
+            continue
+        try:
+            _write(thumb_path, _thumbnail(data, size))
+        except ImportError:
+            break
+        except Exception as e:  # Pillow can't decode it; the original still serves every size
+            print(f"⚠️ No {size}px thumbnail for {name}: {e}")
+    return name
+
+
+def photo_urls(image, photo_dir=None):
+    """{"image_url", "thumbnails": {size: url}} for a students.image value; urls are None without a photo."""
+    match = PHOTO_NAME.match(image or "")
+    if not match:
+        return {"image_url": None, "thumbnails": {}}
+    digest = match.group(1)
+    thumbnails = {}
+    for size in THUMBNAIL_SIZES:
+        thumb = f"{digest}_{size}.jpg"
+        thumbnails[str(size)] = f"/photos/{thumb if os.path.exists(photo_path(thumb, photo_dir)) else image}"
+    return {"image_url": f"/photos/{image}", "thumbnails": thumbnails}
+
+
+def remove_unused_photo(conn, image, photo_dir=None):
+    """Delete a replaced photo and its thumbnails unless a student or archived student still uses it."""
+    match = PHOTO_NAME.match(image or "")
+    if not match:
+        return
+    for table in ("students", "students_archive"):
+        if conn.execute(f"SELECT 1 FROM {table} WHERE image = ? LIMIT 1", (image,)).fetchone():
+            return
+    for name in [image] + [f"{match.group(1)}_{size}.jpg" for size in THUMBNAIL_SIZES]:
+        try:
+            os.remove(photo_path(name, photo_dir))
+        except FileNotFoundError:
+            pass
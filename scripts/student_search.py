@@ -0,0 +1,228 @@
+import base64
+import json
+import re
+import sqlite3
+
+STUDENT_COLUMNS = ("uid", "name", "reg_no", "department", "year", "section", "image")
+
+# Results per search unless the caller asks for fewer; never more than SEARCH_MAX_LIMIT
+SEARCH_LIMIT = 20
+SEARCH_MAX_LIMIT = 200
+
+# Sort keys for list_students; ties (and the unsorted listing) fall back to rowid, which every index carries
+SORT_KEYS = {
+    "uid": "s.uid",
+    "name": "s.name COLLATE NOCASE",
+    "reg_no": "s.reg_no COLLATE NOCASE",
+    "department": "s.department",
+    "year": "s.year",
+    "section": "s.section",
+}
+
+# The trigram tokenizer needs SQLite 3.34+; older builds index whole words for prefix queries instead
+FTS_TOKENIZERS = ("trigram", "unicode61 remove_diacritics 2")
+
+_TERM = re.compile(r"[^\W_]+", re.UNICODE)
+_FTS_JOIN = "JOIN students_fts ON students_fts.rowid = s.rowid"
+_tokenizer = {}
+
+
+def create_search_index(cursor):
+    """students_fts: an FTS5 index over students.name/reg_no, kept current by triggers."""
+    exists = cursor.execute("SELECT 1 FROM sqlite_master WHERE name = 'students_fts'").fetchone()
+    if not exists:
+        trigram, words = FTS_TOKENIZERS
+        statement = ("CREATE VIRTUAL TABLE students_fts USING fts5(name, reg_no, content='students', "
+                     "content_rowid='rowid', tokenize='{}'{})")
+        try:
+            cursor.execute(statement.format(trigram, ""))
+        except sqlite3.OperationalError:  # no such tokenizer
+            cursor.execute(statement.format(words, ", prefix='2 3'"))
+        cursor.execute("INSERT INTO students_fts (students_fts) VALUES ('rebuild')")
+
+    cursor.execute('''
+    CREATE TRIGGER IF NOT EXISTS trg_students_fts_insert AFTER INSERT ON students BEGIN
+        INSERT INTO students_fts (rowid, name, reg_no) VALUES (NEW.rowid, NEW.name, NEW.reg_no);
+    END
+    ''')
+    cursor.execute('''
+    CREATE TRIGGER IF NOT EXISTS trg_students_fts_delete AFTER DELETE ON students BEGIN
+        INSERT INTO students_fts (students_fts, rowid, name, reg_no) VALUES ('delete', OLD.rowid, OLD.name, OLD.reg_no);
+    END
+    ''')
+    cursor.execute('''
+    CREATE TRIGGER IF NOT EXISTS trg_students_fts_update AFTER UPDATE OF uid, name, reg_no ON students BEGIN
+        INSERT INTO students_fts (students_fts, rowid, name, reg_no) VALUES ('delete', OLD.rowid, OLD.name, OLD.reg_no);
+        INSERT INTO students_fts (rowid, name, reg_no) VALUES (NEW.rowid, NEW.name, NEW.reg_no);
+    END
+    ''')
+    # Queries too short for the index (one or two characters) are answered by prefix range scans
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_students_name_nocase ON students (name COLLATE NOCASE)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_students_reg_no_nocase ON students (reg_no COLLATE NOCASE)")
+
+
+def search_tokenizer(conn):
+    path = next((row[2] for row in conn.execute("PRAGMA database_list") if row[1] == "main"), "")
+    if path not in _tokenizer:
+        row = conn.execute("SELECT sql FROM sqlite_master WHERE name = 'students_fts'").fetchone()
+        _tokenizer[path] = "trigram" if row and "trigram" in row[0] else "unicode61"
+    return _tokenizer[path]
+
+
+def _phrase(term):
+    return '"' + term.replace('"', '""') + '"'
+
+
+def _like(term):
+    return term.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def _not_in(uids):
+    return f"s.uid NOT IN ({', '.join('?' for _ in uids)})" if uids else "1"
+
+
+def search_students(conn, q="", department=None, year=None, section=None, limit=SEARCH_LIMIT, fuzzy=True,
+                    offset=0):
+    """Students whose name or reg_no matches q, narrowed by exact department/year filters and a
+    section substring filter (so "A" still finds "CSE-A").
+
+    Names, then reg nos, that start with q come first, read in order straight off their
+    indexes. The rest are students matching every term of q anywhere in the name or reg_no
+    (trigram index). If nothing matches and fuzzy is on, the students sharing the most
+    trigrams with q are returned instead, so a misspelt name still finds its student.
+    offset skips that many results, for reading the next page while truncated.
+    Returns (rows, truncated).
+    """
+    if limit < 1:
+        raise ValueError("limit must be 1 or more")
+    if offset < 0:
+        raise ValueError("offset must be 0 or more")
+    limit = min(int(limit), SEARCH_MAX_LIMIT)
+    # Results are ranked across several queries, so a later page re-reads the ones before it
+    start, limit = offset, offset + limit
+    q = q.strip()
+    terms = _TERM.findall(q)
+    filters, filter_params = [], []
+    for column, value in (("department", department), ("year", year)):
+        if value:
+            filters.append(f"s.{column} = ?")
+            filter_params.append(value)
+    if section:
+        filters.append("instr(s.section, ?) > 0")
+        filter_params.append(section)
+    columns = ", ".join("s." + column for column in STUDENT_COLUMNS)
+    rows = []
+
+    def fetch(where, params, order="", join=""):
+        # One row past the limit tells the caller the results were cut short
+        sql = f"SELECT {columns} FROM students s {join} WHERE {' AND '.join(where) or '1'} {order} LIMIT ?"
+        return conn.execute(sql, (*params, limit + 1 - len(rows))).fetchall()
+
+    if not terms:
+        rows = fetch(filters, filter_params, "ORDER BY s.name COLLATE NOCASE")
+        return rows[start:limit], len(rows) > limit
+
+    # The whole query as a prefix of the name, then of the reg no
+    for column in ("name", "reg_no"):
+        found = [row[0] for row in rows]
+        rows += fetch([f"s.{column} LIKE ? ESCAPE '\\'", *filters, _not_in(found)],
+                      [_like(q) + "%", *filter_params, *found], f"ORDER BY s.{column} COLLATE NOCASE")
+        if len(rows) > limit:
+            return rows[start:limit], True
+
+    # Every term anywhere; terms too short for the trigram index must start a word instead
+    trigram = search_tokenizer(conn) == "trigram"
+    indexed = [term for term in terms if len(term) >= 3] if trigram else terms
+    found = [row[0] for row in rows]
+    where, params = [*filters, _not_in(found)], [*filter_params, *found]
+    for term in terms:
+        if term not in indexed:
+            where.append("(s.name LIKE ? ESCAPE '\\' OR s.name LIKE ? ESCAPE '\\' OR s.reg_no LIKE ? ESCAPE '\\')")
+            params += [_like(term) + "%", "% " + _like(term) + "%", _like(term) + "%"]
+    if indexed:
+        match = " AND ".join(_phrase(term) if trigram else _phrase(term) + "*" for term in indexed)
+        rows += fetch(["students_fts MATCH ?", *where], [match, *params], join=_FTS_JOIN)
+    else:
+        rows += fetch(where, params, "ORDER BY s.name COLLATE NOCASE")
+    if rows or not (fuzzy and trigram and indexed):
+        return rows[start:limit], len(rows) > limit
+
+    grams = sorted({term[i:i + 3].lower() for term in indexed for i in range(len(term) - 2)})
+    rows = fetch(["students_fts MATCH ?", *filters], [" OR ".join(map(_phrase, grams)), *filter_params],
+                 "ORDER BY students_fts.rank", join=_FTS_JOIN)
+    return rows[start:limit], len(rows) > limit
+
+
+def rebuild_search_index(conn):
+    """Re-index every student, e.g. after the students table was rewritten outside SQLite's triggers."""
+    conn.execute("INSERT INTO students_fts (students_fts) VALUES ('rebuild')")
+    conn.commit()
+
+
+def encode_cursor(values):
+    return base64.urlsafe_b64encode(json.dumps(values, separators=(",", ":")).encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor):
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+    except ValueError:
+        raise ValueError("Invalid cursor") from None
+    if not isinstance(values, list) or not values or not isinstance(values[-1], int):
+        raise ValueError("Invalid cursor")
+    return values
+
+
+def list_students(conn, department=None, year=None, section=None, sort=None, limit=None, offset=0,
+                  cursor=None, fields=STUDENT_COLUMNS):
+    """Students matching exact filters, in `sort` order ("-name" for descending), `fields` columns only.
+
+    Pages are read with limit plus either offset or the keyset `cursor` returned for the previous
+    page; a cursor page costs the same however deep it is. Returns (rows, next_cursor).
+    """
+    unknown = [field for field in fields if field not in STUDENT_COLUMNS]
+    if unknown:
+        raise ValueError(f"Unknown field(s): {', '.join(unknown)}")
+    key = (sort or "").lstrip("-")
+    if key and key not in SORT_KEYS:
+        raise ValueError(f"Unknown sort key {key!r}; use one of {', '.join(SORT_KEYS)}")
+    if cursor and offset:
+        raise ValueError("Use either offset or cursor, not both")
+    descending = bool(sort) and sort.startswith("-")
+    keys = [SORT_KEYS[key], "s.rowid"] if key else ["s.rowid"]
+
+    where, params = [], []
+    for column, value in (("department", department), ("year", year), ("section", section)):
+        if value:
+            where.append(f"s.{column} = ?")
+            params.append(value)
+    if cursor:
+        values = decode_cursor(cursor)
+        if len(values) != len(keys):
+            raise ValueError("Cursor does not match this sort order")
+        # The first comparison is what lets SQLite seek into the index instead of scanning to the cursor
+        after, beyond = ("<=", "<") if descending else (">=", ">")
+        if key:
+            where.append(f"{keys[0]} {after} ? AND ({keys[0]} {beyond} ? OR s.rowid {beyond} ?)")
+            params += [values[0], values[0], values[1]]
+        else:
+            where.append(f"s.rowid {beyond} ?")
+            params.append(values[0])
+    sql = (f"SELECT {', '.join('s.' + field for field in fields)}, {', '.join(keys)} "
+           f"FROM students s WHERE {' AND '.join(where) or '1'}")
+    # A plain listing is left unordered so SQLite can answer it from a covering index
+    if key or limit is not None or offset or cursor:
+        sql += " ORDER BY " + ", ".join(f"{expression} {'DESC' if descending else 'ASC'}" for expression in keys)
+    if limit is not None:
+        sql += " LIMIT ? OFFSET ?"
+        params += [limit + 1, offset]
+    elif offset:
+        sql += " LIMIT -1 OFFSET ?"
+        params.append(offset)
+
+    rows = conn.execute(sql, params).fetchall()
+    next_cursor = None
+    if limit is not None and len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(list(rows[-1][len(fields):]))
+    return [row[:len(fields)] for row in rows], next_cursor
@@ -0,0 +1,228 @@
+import json
+import os
+import signal
+import subprocess
+import sys
+import time
+
+from scripts import metrics
+
+# Restart delays double from RESTART_MIN up to RESTART_MAX; a child that stayed ready for
+# STABLE_AFTER seconds starts again from RESTART_MIN
+RESTART_MIN = 1.0
+RESTART_MAX = 60.0
+STABLE_AFTER = 60.0
+# A ready child whose liveness probe keeps failing for this long is restarted
+LIVENESS_GRACE = 30.0
+# A child still not ready this long after starting (e.g. stuck opening the database) is restarted;
+# it covers the API's start-up roll-over of a large attendance table
+READY_TIMEOUT = 120.0
+# Ready children are probed this often (starting ones on every pass)
+LIVENESS_INTERVAL = 5.0
+STOP_TIMEOUT = 10.0
+
+
+def status_path():
+    return os.path.join(metrics.RUN_DIR, "supervisor.json")
+
+
+def heartbeat_path(name):
+    return os.path.join(metrics.RUN_DIR, f"heartbeat_{name}")
+
+
+def touch_heartbeat(name):
+    """Tell the supervisor this process is alive (the file's mtime is the heartbeat)."""
+    os.makedirs(metrics.RUN_DIR, exist_ok=True)
+    with open(heartbeat_path(name), "w") as f:
+        f.write(str(os.getpid()))
+
+
+def heartbeat_age(name):
+    """Seconds since `name` last touched its heartbeat, or None if it never has."""
+    try:
+        return time.time() - os.path.getmtime(heartbeat_path(name))
+    except OSError:
+        return None
+
+
+def heartbeat_probe(name, max_age=10.0):
+    """Probe that passes while `name` has touched its heartbeat within max_age seconds."""
+    def probe(component):
+        try:
+            beat = os.path.getmtime(heartbeat_path(name))
+        except OSError:
+            return False
+        # A heartbeat left over from before this start doesn't count
+        return beat >= component.started_at and time.time() - beat < max_age
+    return probe
+
+
+def http_probe(url, timeout=2.0):
+    import urllib.request
+
+    def probe(component):
+        try:
+            with urllib.request.urlopen(url, timeout=timeout) as response:
+                return response.status == 200
+        except OSError:
+            return False
+    return probe
+
+
+def process_uptime():
+    """Seconds since this process was started (Linux), falling back to time since this module was imported."""
+    try:
+        with open("/proc/self/stat") as f:
+            # starttime is field 22, counted in clock ticks since boot; the command name may contain spaces
+            start_ticks = int(f.read().rsplit(")", 1)[1].split()[19])
+        with open("/proc/uptime") as f:
+            boot_uptime = float(f.read().split()[0])
+        return boot_uptime - start_ticks / os.sysconf("SC_CLK_TCK")
+    except (OSError, ValueError, IndexError):
+        return time.monotonic() - _IMPORTED_AT
+
+
+_IMPORTED_AT = time.monotonic()
+
+
+def read_status():
+    try:
+        with open(status_path()) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+class Component:
+    """One supervised child process with a readiness/liveness probe."""
+
+    def __init__(self, name, command, probe, env=None):
+        self.name = name
+        self.command = command
+        self.probe = probe
+        self.env = env
+        self.process = None
+        self.state = "stopped"
+        self.restarts = 0
+        self.last_exit = None
+        self.started_at = None
+        self.ready_at = None
+        self.failing_since = None
+        self.probed_at = 0.0
+        self.restart_at = 0.0
+        self.delay = RESTART_MIN
+
+    def start(self):
+        self.process = subprocess.Popen(self.command, env=self.env)
+        self.started_at = time.time()
+        self.ready_at = None
+        self.failing_since = None
+        self.state = "starting"
+        print(f"▶️ Started {self.name} (pid {self.process.pid})")
+
+    def stop(self):
+        if self.process is not None and self.process.poll() is None:
+            self.process.terminate()
+            try:
+                self.process.wait(timeout=STOP_TIMEOUT)
+            except subprocess.TimeoutExpired:
+                self.process.kill()
+                self.process.wait()
+        self.state = "stopped"
+
+    def _schedule_restart(self, reason):
+        if self.ready_at and time.time() - self.ready_at >= STABLE_AFTER:
+            self.delay = RESTART_MIN
+        self.restart_at = time.monotonic() + self.delay
+        print(f"⚠️ {self.name} {reason}; restarting in {self.delay:.0f}s")
+        self.delay = min(RESTART_MAX, self.delay * 2)
+        self.state = "restarting"
+
+    def check(self):
+        """Advance the component's state machine by one step."""
+        if self.state == "restarting":
+            if time.monotonic() >= self.restart_at:
+                self.restarts += 1
+                self.start()
+            return
+        code = self.process.poll()
+        if code is not None:
+            self.last_exit = {"code": code, "at": time.strftime("%Y-%m-%d %H:%M:%S")}
+            self._schedule_restart(f"exited with code {code}")
+            return
+        if self.state == "ready" and time.monotonic() - self.probed_at < LIVENESS_INTERVAL:
+            return
+        self.probed_at = time.monotonic()
+        healthy = self.probe(self)
+        if self.state == "starting":
+            if healthy:
+                self.state = "ready"
+                self.ready_at = time.time()
+                print(f"✅ {self.name} ready in {self.ready_at - self.started_at:.2f}s")
+            elif time.time() - self.started_at > READY_TIMEOUT:
+                self.stop()
+                self.last_exit = {"code": None, "at": time.strftime("%Y-%m-%d %H:%M:%S"),
+                                  "reason": f"not ready after {READY_TIMEOUT:.0f}s"}
+                self._schedule_restart(f"was not ready after {READY_TIMEOUT:.0f}s")
+            return
+        if healthy:
+            self.failing_since = None
+        elif self.failing_since is None:
+            self.failing_since = time.monotonic()
+        elif time.monotonic() - self.failing_since > LIVENESS_GRACE:
+            self.stop()
+            self._schedule_restart(f"failed its health check for {LIVENESS_GRACE:.0f}s")
+
+    def status(self):
+        return {
+            "name": self.name,
+            "state": self.state,
+            "pid": self.process.pid if self.process is not None and self.state != "restarting" else None,
+            "restarts": self.restarts,
+            "started_at": self.started_at,
+            "ready_at": self.ready_at,
+            "startup_s": round(self.ready_at - self.started_at, 3) if self.ready_at else None,
+            "last_exit": self.last_exit,
+        }
+
+
+def write_status(components):
+    os.makedirs(metrics.RUN_DIR, exist_ok=True)
+    path = status_path()
+    with open(path + ".tmp", "w") as f:
+        json.dump({"supervisor_pid": os.getpid(), "updated_at": time.time(),
+                   "components": [component.status() for component in components]}, f)
+    os.replace(path + ".tmp", path)
+
+
+def supervise(components, interval=0.2, status_every=1.0):
+    """Start every component at once and keep them running until SIGINT/SIGTERM."""
+    stopping = []
+
+    def request_stop(signum, frame):
+        stopping.append(signum)
+
+    signal.signal(signal.SIGTERM, request_stop)
+    for component in components:
+        component.start()
+
+    written = 0.0
+    try:
+        while not stopping:
+            for component in components:
+                component.check()
+            if time.monotonic() - written >= status_every:
+                write_status(components)
+                written = time.monotonic()
+            time.sleep(interval)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        print("🧹 Stopping components...")
+        for component in reversed(components):
+            component.stop()
+        write_status(components)
+
+
+def python_command(script, *args):
+    return [sys.executable, script, *args]
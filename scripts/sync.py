@@ -0,0 +1,274 @@
+import gzip
+import json
+import threading
+import uuid
+from datetime import datetime, timedelta
+
+from scripts import metrics
+from scripts.config import settings
+from scripts.db import connect
+
+# Set on edge nodes: scans are then also queued in sync_outbox for the sync agent
+NODE_ID = settings["node_id"]
+# Central API the sync agent forwards to, e.g. http://central.local:8000
+SYNC_URL = settings["sync_url"]
+# Shared secret sent as X-Sync-Token; the central ingest endpoint rejects other tokens when set
+SYNC_TOKEN = settings["sync_token"]
+
+SCAN_FIELDS = ("scan_id", "uid", "name", "date", "time", "status")
+ROSTER_FIELDS = ("uid", "name", "reg_no", "department", "year", "section", "image")
+# How often an edge logger asks the central server for roster changes
+ROSTER_INTERVAL = settings["roster_interval"]
+# Central server: scan_ids older than this are forgotten. Replays come from retried batches within
+# minutes, and attendance stays one row per student per day regardless
+SYNC_RECEIVED_DAYS = settings["sync_received_days"]
+
+roster_pulls = metrics.counter("rfid_roster_pulls_total", "Roster pulls from the central server by kind and result",
+                               ("kind", "result"))
+
+
+def queue_scan(cursor, uid, name, date, time, status):
+    """Add a scan to the outbox inside the caller's transaction. Returns its scan_id."""
+    scan_id = f"{NODE_ID}-{uuid.uuid4().hex}"
+    cursor.execute('''
+        INSERT INTO sync_outbox (scan_id, uid, name, date, time, status)
+        VALUES (?, ?, ?, ?, ?, ?)
+    ''', (scan_id, uid, name, date, time, status))
+    return scan_id
+
+
+def pending_scans(conn, limit=500):
+    cursor = conn.cursor()
+    cursor.execute(f'''
+        SELECT seq, {", ".join(SCAN_FIELDS)} FROM sync_outbox
+        WHERE sent_at IS NULL ORDER BY seq LIMIT ?
+    ''', (limit,))
+    return cursor.fetchall()
+
+
+def mark_sent(conn, last_seq):
+    conn.execute("UPDATE sync_outbox SET sent_at = ? WHERE sent_at IS NULL AND seq <= ?",
+                 (datetime.now().strftime("%Y-%m-%d %H:%M:%S"), last_seq))
+    conn.commit()
+
+
+def reject_scans(conn, rows, http_status, reason):
+    """Move outbox rows the central server refused into sync_rejected, so they stop blocking the queue."""
+    rejected_at = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    cursor = conn.cursor()
+    cursor.execute("BEGIN IMMEDIATE")
+    try:
+        for row in rows:
+            cursor.execute(f'''
+                INSERT OR IGNORE INTO sync_rejected (seq, {", ".join(SCAN_FIELDS)}, http_status, reason, rejected_at)
+                SELECT seq, {", ".join(SCAN_FIELDS)}, ?, ?, ? FROM sync_outbox WHERE seq = ?
+            ''', (http_status, reason, rejected_at, row[0]))
+            cursor.execute("DELETE FROM sync_outbox WHERE seq = ?", (row[0],))
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+
+
+def prune_sent(conn, days=7):
+    """Forget outbox rows the central server acknowledged more than `days` ago."""
+    conn.execute("DELETE FROM sync_outbox WHERE sent_at IS NOT NULL AND sent_at < datetime('now', 'localtime', ?)",
+                 (f"-{days} days",))
+    conn.commit()
+
+
+def encode_batch(node, rows):
+    """gzip-compressed JSON body for POST /sync/attendance."""
+    scans = [dict(zip(SCAN_FIELDS, row[1:])) for row in rows]
+    return gzip.compress(json.dumps({"node": node, "scans": scans}, separators=(",", ":")).encode("utf-8"))
+
+
+def decode_batch(body, content_encoding=""):
+    if "gzip" in (content_encoding or "").lower():
+        body = gzip.decompress(body)
+    payload = json.loads(body.decode("utf-8"))
+    if not isinstance(payload, dict) or not isinstance(payload.get("scans"), list):
+        raise ValueError('Expected {"node": ..., "scans": [...]}')
+    for scan in payload["scans"]:
+        if not isinstance(scan, dict):
+            raise ValueError("Each scan must be an object")
+        missing = [field for field in SCAN_FIELDS if not scan.get(field)]
+        if missing:
+            raise ValueError(f"Scan is missing {', '.join(missing)}")
+    return str(payload.get("node") or "unknown"), payload["scans"]
+
+
+def ingest_scans(conn, node, scans):
+    """Apply a batch from an edge node in one transaction; replays of a scan_id are ignored.
+
+    A student who tapped at two nodes on the same day still ends up with one attendance row.
+    Returns (inserted, duplicates).
+    """
+    received_at = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    cursor = conn.cursor()
+    cursor.execute("BEGIN IMMEDIATE")
+    try:
+        cursor.execute("CREATE TEMP TABLE IF NOT EXISTS sync_batch (scan_id TEXT PRIMARY KEY, uid TEXT, name TEXT, "
+                       "date TEXT, time TEXT, status TEXT)")
+        cursor.execute("DELETE FROM sync_batch")
+        cursor.executemany(f"INSERT OR IGNORE INTO sync_batch ({', '.join(SCAN_FIELDS)}) VALUES (?, ?, ?, ?, ?, ?)",
+                           [tuple(str(scan[field]) for field in SCAN_FIELDS) for scan in scans])
+        cursor.execute("DELETE FROM sync_batch WHERE scan_id IN (SELECT scan_id FROM sync_received)")
+
+        cursor.execute('''
+            INSERT INTO attendance (uid, name, date, time, status)
+            SELECT uid, name, date, MIN(time), status FROM sync_batch b
+            WHERE NOT EXISTS (SELECT 1 FROM attendance a WHERE a.uid = b.uid AND a.date = b.date)
+            GROUP BY uid, date
+        ''')
+        inserted = cursor.rowcount
+        cursor.execute("INSERT INTO sync_received (scan_id, node, received_at) SELECT scan_id, ?, ? FROM sync_batch",
+                       (node, received_at))
+        forget_before = (datetime.now() - timedelta(days=SYNC_RECEIVED_DAYS)).strftime("%Y-%m-%d %H:%M:%S")
+        cursor.execute("DELETE FROM sync_received WHERE received_at < ?", (forget_before,))
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    return inserted, len(scans) - inserted
+
+
+def roster_version(conn):
+    row = conn.execute("SELECT MAX(version) FROM roster_changes").fetchone()
+    return row[0] or 0
+
+
+def roster_snapshot(conn):
+    """The whole roster as {"version", "columns", "rows"}, rows being plain lists."""
+    cursor = conn.cursor()
+    cursor.execute("BEGIN")
+    try:
+        version = roster_version(conn)
+        cursor.execute(f"SELECT {', '.join(ROSTER_FIELDS)} FROM students ORDER BY uid")
+        rows = [list(row) for row in cursor.fetchall()]
+    finally:
+        conn.rollback()
+    return {"version": version, "columns": list(ROSTER_FIELDS), "rows": rows}
+
+
+def roster_changes(conn, since):
+    """Students added/changed and UIDs removed after version `since`."""
+    cursor = conn.cursor()
+    cursor.execute("BEGIN")
+    try:
+        version = roster_version(conn)
+        # Only the latest change per UID matters; the student row itself carries the current values
+        cursor.execute(f'''
+            SELECT {", ".join("s." + field for field in ROSTER_FIELDS)}, c.uid
+            FROM (SELECT uid, MAX(version) FROM roster_changes WHERE version > ? GROUP BY uid) c
+            LEFT JOIN students s ON s.uid = c.uid
+            ORDER BY c.uid
+        ''', (since,))
+        rows = cursor.fetchall()
+    finally:
+        conn.rollback()
+    return {
+        "version": version,
+        "since": since,
+        "columns": list(ROSTER_FIELDS),
+        "rows": [list(row[:-1]) for row in rows if row[0] is not None],
+        "deleted": [row[-1] for row in rows if row[0] is None],
+    }
+
+
+def _set_state(cursor, key, value):
+    cursor.execute("INSERT INTO sync_state (key, value) VALUES (?, ?) ON CONFLICT(key) DO UPDATE SET value = excluded.value",
+                   (key, str(value)))
+
+
+def local_roster_version(conn):
+    row = conn.execute("SELECT value FROM sync_state WHERE key = 'roster_version'").fetchone()
+    return int(row[0]) if row else None
+
+
+def apply_roster(conn, payload, snapshot=False):
+    """Bring the local students table in line with a snapshot or a delta from the central server.
+
+    A snapshot replaces the roster outright (the central server is authoritative); a delta
+    upserts its rows and removes its deleted UIDs. Returns (upserted, deleted).
+    """
+    columns = payload["columns"]
+    if "uid" not in columns or not set(columns) <= set(ROSTER_FIELDS):
+        raise ValueError(f"Unexpected roster columns: {columns}")
+    placeholders = ", ".join("?" for _ in columns)
+    updates = ", ".join(f"{column} = excluded.{column}" for column in columns if column != "uid")
+    cursor = conn.cursor()
+    cursor.execute("BEGIN IMMEDIATE")
+    try:
+        if snapshot:
+            cursor.execute("CREATE TEMP TABLE IF NOT EXISTS roster_snapshot (uid TEXT PRIMARY KEY)")
+            cursor.execute("DELETE FROM roster_snapshot")
+            cursor.executemany("INSERT OR IGNORE INTO roster_snapshot (uid) VALUES (?)",
+                               [(row[columns.index("uid")],) for row in payload["rows"]])
+            cursor.execute("DELETE FROM students WHERE uid NOT IN (SELECT uid FROM roster_snapshot)")
+        else:
+            cursor.executemany("DELETE FROM students WHERE uid = ?", [(uid,) for uid in payload["deleted"]])
+        deleted = max(cursor.rowcount, 0)
+        cursor.executemany(f'''
+            INSERT INTO students ({", ".join(columns)}) VALUES ({placeholders})
+            ON CONFLICT(uid) DO UPDATE SET {updates}
+        ''', payload["rows"])
+        _set_state(cursor, "roster_version", payload["version"])
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    return len(payload["rows"]), deleted
+
+
+def _get_json(url, token=SYNC_TOKEN, timeout=15.0):
+    import urllib.request  # only edge nodes talk to the central server; keeps imports light elsewhere
+    request = urllib.request.Request(url, headers={
+        "Accept-Encoding": "gzip",
+        **({"X-Sync-Token": token} if token else {}),
+    })
+    with urllib.request.urlopen(request, timeout=timeout) as response:
+        body = response.read()
+        if "gzip" in (response.headers.get("Content-Encoding") or ""):
+            body = gzip.decompress(body)
+    return json.loads(body.decode("utf-8"))
+
+
+def pull_roster(conn, url=SYNC_URL):
+    """Fetch roster changes since the local version (or a full snapshot the first time) and apply them."""
+    import urllib.error
+    base = url.rstrip("/")
+    version = local_roster_version(conn)
+    if version is not None:
+        try:
+            payload = _get_json(f"{base}/roster/changes?since={version}")
+        except urllib.error.HTTPError as e:
+            if e.code != 410:
+                raise
+            version = None  # the server no longer has changes that old
+        else:
+            if payload["version"] == version:
+                roster_pulls.inc(kind="changes", result="unchanged")
+                return 0, 0
+            roster_pulls.inc(kind="changes", result="applied")
+            return apply_roster(conn, payload)
+    payload = _get_json(f"{base}/roster/snapshot")
+    roster_pulls.inc(kind="snapshot", result="applied")
+    return apply_roster(conn, payload, snapshot=True)
+
+
+def roster_loop(db_path, url=SYNC_URL, stop_event=None, interval=ROSTER_INTERVAL):
+    """Keep an edge node's roster current until stop_event is set (meant for a daemon thread)."""
+    stop_event = stop_event or threading.Event()
+    while not stop_event.is_set():
+        conn = connect(db_path)
+        try:
+            upserted, deleted = pull_roster(conn, url)
+            if upserted or deleted:
+                print(f"👥 Roster updated: {upserted} added/changed, {deleted} removed")
+        except (OSError, ValueError) as e:  # urllib's URLError/HTTPError are OSErrors
+            roster_pulls.inc(kind="any", result="error")
+            print(f"⚠️ Roster sync failed: {e}")
+        finally:
+            conn.close()
+        stop_event.wait(interval)
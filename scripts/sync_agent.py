@@ -0,0 +1,140 @@
+import os
+import random
+import sys
+import time
+import urllib.error
+import urllib.request
+
+# Setup paths
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BASE_DIR)
+
+from scripts.config import settings
+from scripts.create_db import create_tables
+from scripts.db import connect
+from scripts.sync import (NODE_ID, SYNC_URL, SYNC_TOKEN, encode_batch, mark_sent, pending_scans, prune_sent,
+                          reject_scans)
+from scripts import metrics
+from scripts.supervisor import touch_heartbeat
+
+DB_PATH = settings["db_path"]
+
+# Scans per POST; a morning rush that piled up during an outage goes out in a few requests
+BATCH_SIZE = settings["sync_batch_size"]
+# Seconds between outbox checks when everything has been delivered
+SYNC_INTERVAL = settings["sync_interval"]
+# Retry delays after a failed POST double from RETRY_MIN up to RETRY_MAX (with jitter)
+RETRY_MIN = 2.0
+RETRY_MAX = 300.0
+TIMEOUT = 15.0
+
+batches = metrics.counter("rfid_sync_batches_total", "Batches POSTed to the central server by result", ("result",))
+scans_sent = metrics.counter("rfid_sync_scans_total", "Scans acknowledged by the central server")
+batch_bytes = metrics.histogram("rfid_sync_batch_bytes", "Compressed batch size", buckets=(1e3, 1e4, 1e5, 1e6))
+pending = metrics.gauge("rfid_sync_pending", "Scans in the outbox not yet acknowledged")
+
+
+def post_batch(url, body, token=SYNC_TOKEN):
+    request = urllib.request.Request(url.rstrip("/") + "/sync/attendance", data=body, method="POST", headers={
+        "Content-Type": "application/json",
+        "Content-Encoding": "gzip",
+        **({"X-Sync-Token": token} if token else {}),
+    })
+    with urllib.request.urlopen(request, timeout=TIMEOUT) as response:
+        return response.status
+
+
+def rejected(error):
+    """True for an HTTP 4xx that retrying the same batch can't fix; a bad token (401/403) is not one of them."""
+    return isinstance(error, urllib.error.HTTPError) and 400 <= error.code < 500 and error.code not in (401, 403)
+
+
+def deliver(conn, rows, url=SYNC_URL, node=NODE_ID):
+    """POST rows and mark them sent. A batch the server refuses is split in half until the scans it
+    objects to are found; those are moved to sync_rejected. Returns scans delivered; raises on failure."""
+    body = encode_batch(node, rows)
+    batch_bytes.observe(len(body))
+    try:
+        post_batch(url, body)
+    except Exception as e:
+        if not rejected(e):
+            batches.inc(result="error")
+            raise
+        batches.inc(result="rejected")
+        if len(rows) > 1:
+            half = len(rows) // 2
+            return deliver(conn, rows[:half], url, node) + deliver(conn, rows[half:], url, node)
+        reason = e.read(500).decode("utf-8", "replace")
+        reject_scans(conn, rows, e.code, reason)
+        print(f"🚫 Central server refused scan {rows[0][1]} (HTTP {e.code}: {reason}); moved to sync_rejected")
+        return 0
+    batches.inc(result="ok")
+    mark_sent(conn, rows[-1][0])
+    scans_sent.inc(len(rows))
+    return len(rows)
+
+
+def sync_once(conn, url=SYNC_URL, node=NODE_ID):
+    """Forward everything in the outbox, oldest first. Returns scans delivered; raises on failure."""
+    delivered = 0
+    while True:
+        rows = pending_scans(conn, BATCH_SIZE)
+        if not rows:
+            return delivered
+        delivered += deliver(conn, rows, url, node)
+
+
+def count_pending(conn):
+    return conn.execute("SELECT COUNT(*) FROM sync_outbox WHERE sent_at IS NULL").fetchone()[0]
+
+
+def run(db_path=DB_PATH, url=SYNC_URL, node=NODE_ID, once=False):
+    conn = connect(db_path)
+    create_tables(conn)
+    delay = RETRY_MIN
+    try:
+        while True:
+            try:
+                delivered = sync_once(conn, url, node)
+                if delivered:
+                    print(f"📤 Forwarded {delivered} scan(s) to {url}")
+                delay = RETRY_MIN
+                wait = SYNC_INTERVAL
+            except (urllib.error.URLError, OSError) as e:
+                if isinstance(e, urllib.error.HTTPError) and e.code in (401, 403):
+                    # Every batch would be refused the same way; retrying can't help
+                    print(f"❌ Central server refused this node's sync token (HTTP {e.code}); "
+                          f"check RFID_SYNC_TOKEN. Scans stay queued.")
+                    return
+                # Central server unreachable or failing: keep scans queued and back off
+                wait = delay * random.uniform(0.5, 1.0)
+                print(f"⚠️ Sync failed ({e}); retrying in {wait:.0f}s")
+                delay = min(RETRY_MAX, delay * 2)
+            pending.set(count_pending(conn))
+            metrics.write_state("sync")
+            touch_heartbeat("sync")
+            if once:
+                return
+            prune_sent(conn)
+            time.sleep(wait)
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Forward this node's scans to the central server")
+    parser.add_argument("--url", default=SYNC_URL, help="central API base URL (default: $RFID_SYNC_URL)")
+    parser.add_argument("--db", default=DB_PATH)
+    parser.add_argument("--once", action="store_true", help="sync what is queued and exit")
+    args = parser.parse_args()
+
+    if not args.url or not NODE_ID:
+        print("❌ Set RFID_NODE_ID and RFID_SYNC_URL (or --url) to run the sync agent.")
+        sys.exit(1)
+    print(f"🔁 Sync agent for node {NODE_ID} -> {args.url}. Press Ctrl+C to stop.")
+    try:
+        run(args.db, args.url, NODE_ID, once=args.once)
+    except KeyboardInterrupt:
+        print("\n🛑 Sync agent stopped.")
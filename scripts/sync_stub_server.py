@@ -0,0 +1,80 @@
+import json
+import os
+import random
+import sys
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Setup paths
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BASE_DIR)
+
+from scripts.create_db import create_tables
+from scripts.db import connect
+from scripts.sync import decode_batch, ingest_scans
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    """Stand-in for the central API's POST /sync/attendance, with optional simulated outages."""
+
+    db_path = None
+    fail_rate = 0.0
+    delay = 0.0
+
+    def _reply(self, status, payload):
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_POST(self):
+        if self.path != "/sync/attendance":
+            return self._reply(404, {"detail": "Not Found"})
+        body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        if self.delay:
+            time.sleep(self.delay)
+        if random.random() < self.fail_rate:
+            return self._reply(503, {"detail": "Simulated outage"})
+        try:
+            node, scans = decode_batch(body, self.headers.get("Content-Encoding", ""))
+        except (ValueError, OSError, UnicodeDecodeError) as e:
+            return self._reply(400, {"detail": f"Could not parse batch: {e}"})
+
+        conn = connect(self.db_path)
+        try:
+            inserted, duplicates = ingest_scans(conn, node, scans)
+        finally:
+            conn.close()
+        print(f"📥 {node}: {len(scans)} scan(s), {len(body)} bytes -> {inserted} new, {duplicates} duplicate")
+        self._reply(200, {"success": True, "node": node, "received": len(scans),
+                          "inserted": inserted, "duplicates": duplicates})
+
+    def log_message(self, format, *args):
+        pass
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Local stand-in for the central server's sync endpoint")
+    parser.add_argument("--port", type=int, default=8100)
+    parser.add_argument("--db", default="central_stub.db", help="database the batches are ingested into")
+    parser.add_argument("--fail-rate", type=float, default=0.0, help="fraction of batches answered with 503")
+    parser.add_argument("--delay", type=float, default=0.0, help="seconds to wait before answering")
+    args = parser.parse_args()
+
+    conn = connect(args.db)
+    create_tables(conn)
+    conn.close()
+
+    StubHandler.db_path = args.db
+    StubHandler.fail_rate = args.fail_rate
+    StubHandler.delay = args.delay
+    server = ThreadingHTTPServer(("0.0.0.0", args.port), StubHandler)
+    print(f"🧪 Sync stub listening on http://localhost:{args.port} (ingesting into {args.db}). Press Ctrl+C to stop.")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\n🛑 Sync stub stopped.")
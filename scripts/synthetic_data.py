@@ -0,0 +1,104 @@
+import os
+import random
+import sys
+from datetime import datetime, timedelta
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BASE_DIR)
+
+from scripts.config import settings
+from scripts.create_db import create_tables
+from scripts.db import connect
+
+DB_PATH = settings["db_path"]
+
+DEPARTMENTS = ["CSE", "ECE", "EEE", "MECH", "CIVIL", "IT"]
+SECTIONS = ["A", "B", "C"]
+FIRST_NAMES = ["Arun", "Divya", "Karthik", "Priya", "Rahul", "Sneha", "Vijay", "Anitha",
+               "Suresh", "Meena", "Ganesh", "Kavya", "Manoj", "Lakshmi", "Naveen", "Revathi"]
+LAST_NAMES = ["Kumar", "R", "S", "M", "Raj", "Devi", "Krishnan", "Bala", "Prasad", "Nair"]
+
+BATCH_SIZE = 5000
+
+# Named dataset sizes: (students, days of history)
+SCALES = {
+    "small": (300, 90),
+    "college": (2000, 365),
+    "campus": (5000, 3 * 365),
+}
+
+
+def generate_students(count, rng):
+    students = []
+    uids = rng.sample(range(10 ** 11, 10 ** 12), count)
+    for index, uid in enumerate(uids):
+        department = rng.choice(DEPARTMENTS)
+        year = str(rng.randint(1, 4))
+        name = f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}"
+        reg_no = f"3108{25 - int(year)}{DEPARTMENTS.index(department) + 101}{index:04d}"
+        students.append((str(uid), name, reg_no, department, year, rng.choice(SECTIONS)))
+    return students
+
+
+def generate_history(students, days, attendance_rate, rng, end_date=None):
+    """Yield one attendance row per student per weekday (Sundays off) for `days` days."""
+    end = datetime.strptime(end_date, "%Y-%m-%d") if end_date else datetime.now() - timedelta(days=1)
+    # Each student gets their own habit so per-student summaries vary
+    habits = {uid: min(1.0, max(0.0, rng.gauss(attendance_rate, 0.08))) for uid, *_ in students}
+    for offset in range(days, 0, -1):
+        day = end - timedelta(days=offset - 1)
+        if day.weekday() == 6:
+            continue
+        date = day.strftime("%Y-%m-%d")
+        for uid, name, *_ in students:
+            if rng.random() < habits[uid]:
+                minute = min(59, max(0, int(rng.gauss(25, 10))))
+                yield (uid, name, date, f"08:{minute:02d}:{rng.randint(0, 59):02d}", "Present")
+            else:
+                yield (uid, name, date, "08:30:00", "Absent")
+
+
+def generate(db_path, students=500, days=180, attendance_rate=0.85, seed=None, end_date=None):
+    """Fill db_path with a synthetic roster and attendance history. Returns the student UIDs."""
+    rng = random.Random(seed)
+    os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+    conn = connect(db_path)
+    create_tables(conn)
+
+    roster = generate_students(students, rng)
+    cursor = conn.cursor()
+    cursor.executemany('''
+        INSERT OR IGNORE INTO students (uid, name, reg_no, department, year, section)
+        VALUES (?, ?, ?, ?, ?, ?)
+    ''', roster)
+
+    batch = []
+    for row in generate_history(roster, days, attendance_rate, rng, end_date):
+        batch.append(row)
+        if len(batch) >= BATCH_SIZE:
+            cursor.executemany("INSERT INTO attendance (uid, name, date, time, status) VALUES (?, ?, ?, ?, ?)", batch)
+            batch = []
+    if batch:
+        cursor.executemany("INSERT INTO attendance (uid, name, date, time, status) VALUES (?, ?, ?, ?, ?)", batch)
+
+    conn.commit()
+    conn.close()
+    return [student[0] for student in roster]
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Fill a database with synthetic students and attendance")
+    parser.add_argument("--db", default=DB_PATH, help="database file to fill (default: database/students.db)")
+    parser.add_argument("--scale", choices=sorted(SCALES), help="preset size; overrides --students and --days")
+    parser.add_argument("--students", type=int, default=500)
+    parser.add_argument("--days", type=int, default=180, help="days of attendance history")
+    parser.add_argument("--attendance-rate", type=float, default=0.85)
+    parser.add_argument("--seed", type=int)
+    args = parser.parse_args()
+    if args.scale:
+        args.students, args.days = SCALES[args.scale]
+
+    uids = generate(args.db, args.students, args.days, args.attendance_rate, args.seed)
+    print(f"✅ Generated {len(uids)} students with {args.days} days of history in {args.db}")
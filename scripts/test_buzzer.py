@@ -1,20 +1,20 @@
-import RPi.GPIO as GPIO
+import os
+import sys
 import time
 
-BUZZER_PIN = 18  # GPIO 18 = Physical Pin 12
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BASE_DIR)
 
-# Setup
-GPIO.setmode(GPIO.BCM)
-GPIO.setwarnings(False)
-GPIO.setup(BUZZER_PIN, GPIO.OUT)
+from scripts.hardware import get_buzzer
+
+# GPIO 18 = Physical Pin 12 (or a simulated buzzer with RFID_BACKEND=simulated)
+buzzer = get_buzzer()
 
 try:
     print("🔔 Testing buzzer...")
     for i in range(3):
-        GPIO.output(BUZZER_PIN, GPIO.HIGH)
         print(f"Beep {i+1}")
-        time.sleep(0.3)
-        GPIO.output(BUZZER_PIN, GPIO.LOW)
+        buzzer.beep(0.3)
         time.sleep(0.3)
 
     print("✅ Buzzer test complete.")
@@ -23,5 +23,4 @@ except KeyboardInterrupt:
     print("\n🛑 Test stopped.")
 
 finally:
-    GPIO.output(BUZZER_PIN, GPIO.LOW)
-    GPIO.cleanup()
+    buzzer.cleanup()